@@ -0,0 +1,112 @@
+"""Аутентификация по JWT без запроса пользователя из БД.
+
+Для проверки прав достаточно нескольких полей пользователя (IDENTITY_FIELDS).
+Они хранятся в кэше JWT_USER_CACHE['ALIAS'] не дольше TIMEOUT секунд
+и сбрасываются при изменении или удалении пользователя (см. signals.py).
+Сброс затрагивает только кэш ALIAS: если бэкенд не общий для процессов
+(LocMemCache), остальные процессы видят прежние права пользователя до
+TIMEOUT секунд, поэтому таймаут по умолчанию короткий.
+request.user - экземпляр User, в котором загружены только эти поля,
+остальные поля загружаются из БД при первом обращении.
+
+При TRUST_TOKEN_CLAIMS поля берутся из самого токена (см. get_token), и
+кэш не используется. Изменение роли тогда действует только для новых
+токенов.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+IDENTITY_FIELDS = ('id', 'username', 'role', 'is_superuser', 'is_active')
+USER_CACHE_DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 30,
+    'TRUST_TOKEN_CLAIMS': False,
+}
+
+
+def get_user_cache_settings():
+    return {**USER_CACHE_DEFAULTS, **getattr(settings, 'JWT_USER_CACHE', {})}
+
+
+def _cache():
+    return caches[get_user_cache_settings()['ALIAS']]
+
+
+def _identity_key(user_id):
+    return f'jwt_user:{user_id}'
+
+
+def get_token(user):
+    """Токен доступа с полями пользователя, нужными для проверки прав."""
+    token = AccessToken.for_user(user)
+    for field in IDENTITY_FIELDS:
+        if field != 'id':
+            token[field] = getattr(user, field)
+    return token
+
+
+def invalidate_identity(user_id):
+    """Удаляет закэшированные поля пользователя."""
+    _cache().delete(_identity_key(user_id))
+
+
+def get_identity(user_id):
+    """Поля пользователя из кэша или из БД (None, если его нет)."""
+    options = get_user_cache_settings()
+    cache = caches[options['ALIAS']]
+    key = _identity_key(user_id)
+    identity = cache.get(key)
+    if identity is None:
+        identity = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).values(*IDENTITY_FIELDS).first()
+        if identity is not None:
+            cache.set(key, identity, options['TIMEOUT'])
+    return identity
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, берущий пользователя из кэша или из токена."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification'))
+
+        identity = None
+        if get_user_cache_settings()['TRUST_TOKEN_CLAIMS']:
+            identity = self.identity_from_claims(validated_token, user_id)
+        if identity is None:
+            identity = get_identity(user_id)
+        if identity is None:
+            raise AuthenticationFailed(_('User not found'),
+                                       code='user_not_found')
+        if not identity['is_active']:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+        # from_db ожидает значения в порядке полей модели.
+        fields = [field.attname for field in
+                  self.user_model._meta.concrete_fields
+                  if field.attname in identity]
+        return self.user_model.from_db(
+            DEFAULT_DB_ALIAS, fields, [identity[field] for field in fields])
+
+    @staticmethod
+    def identity_from_claims(validated_token, user_id):
+        identity = {'id': user_id}
+        for field in IDENTITY_FIELDS[1:]:
+            if field not in validated_token:
+                return None
+            identity[field] = validated_token[field]
+        return identity
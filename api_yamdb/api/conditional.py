@@ -0,0 +1,80 @@
+"""Условные GET-запросы (ETag и Last-Modified) для представлений API.
+
+Валидаторы ответа вычисляются до сериализации. В ETag входят версии
+областей данных (см. response_cache.py), которые меняются при любых
+изменениях данных ответа, в том числе не затрагивающих updated_at
+(жанры произведения, имя автора, массовая загрузка данных). Поэтому
+ETag списка строится без запросов к БД: по пути с параметрами запроса
+и версиям. У объекта есть и Last-Modified - его поле updated_at. Если
+заголовки If-None-Match или If-Modified-Since запроса совпадают
+с валидаторами, возвращается ответ 304 без сериализации данных.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+from reviews.cache import get_version
+
+from .response_cache import GLOBAL_SCOPE, get_versions
+
+
+class ConditionalListMixin:
+    """Ответы 304 для list.
+
+    etag_catalogs - справочники, данные которых попадают в ответ:
+    их версии (см. reviews/cache.py) входят в ETag;
+    etag_scopes() - области данных ответа, их версии также входят в ETag.
+    """
+
+    etag_catalogs = ()
+
+    def etag_scopes(self):
+        return ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_list_validators(),
+            lambda: super(ConditionalListMixin, self).list(
+                request, *args, **kwargs))
+
+    def get_list_validators(self):
+        return self.make_validators(None, self.request.get_full_path())
+
+    def make_validators(self, last_modified, *parts):
+        """ETag и время изменения (timestamp) для ответа."""
+        parts = (
+            self.request.accepted_renderer.format,
+            last_modified.isoformat() if last_modified else '',
+            *parts,
+            *(get_version(model) for model in self.etag_catalogs),
+            *get_versions((GLOBAL_SCOPE, *self.etag_scopes())),
+        )
+        etag = hashlib.md5(
+            ':'.join(map(str, parts)).encode()).hexdigest()
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        return quote_etag(etag), last_modified
+
+    def conditional_response(self, validators, get_response):
+        etag, last_modified = validators
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = get_response()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """Ответы 304 для list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional_response(
+            self.make_validators(instance.updated_at, instance.pk),
+            lambda: Response(self.get_serializer(instance).data))
@@ -0,0 +1,181 @@
+"""Чтение из реплик БД для безопасных запросов к API.
+
+Представления с ReplicaReadMixin выполняют GET, HEAD и OPTIONS на одной
+из реплик DATABASE_ROUTING['REPLICAS'] (алиасы из DATABASES), остальные
+запросы и любые записи идут в основную БД ('default').
+
+Реплика выбирается по кругу среди доступных. Если к реплике не удалось
+подключиться или запрос к ней завершился ошибкой БД, она исключается из
+выбора на RETRY_AFTER секунд; когда доступных реплик нет, чтение идёт
+в основную БД. Запрос к API, прерванный ошибкой реплики, повторяется
+на основной БД.
+
+После успешного изменяющего запроса клиент на STICKY_SECONDS секунд
+закрепляется за основной БД (см. ReadYourWritesMiddleware), чтобы сразу
+видеть свои изменения, даже если реплика отстаёт. Закрепление хранится
+в cookie и в кэше по id пользователя для клиентов без cookie.
+"""
+
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+ROUTING_DEFAULTS = {
+    'REPLICAS': (),
+    'STICKY_SECONDS': 5,
+    'RETRY_AFTER': 30,
+    'CACHE_ALIAS': 'default',
+    'COOKIE_NAME': 'db_primary',
+}
+
+read_from_replicas = ContextVar('read_from_replicas', default=False)
+# Реплики, выбранные для чтения в текущем запросе к API.
+used_replicas = ContextVar('used_replicas', default=None)
+
+
+def get_routing_settings():
+    return {**ROUTING_DEFAULTS, **getattr(settings, 'DATABASE_ROUTING', {})}
+
+
+class ReplicaPool:
+    """Выбор реплики по кругу с учётом недоступных."""
+
+    def __init__(self):
+        self._counter = itertools.count()
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def choose(self, replicas, retry_after):
+        """Алиас доступной реплики или основной БД."""
+        with self._lock:
+            start = next(self._counter)
+        now = time.monotonic()
+        for offset in range(len(replicas)):
+            alias = replicas[(start + offset) % len(replicas)]
+            if self._down_until.get(alias, 0) > now:
+                continue
+            try:
+                connections[alias].ensure_connection()
+            except DatabaseError:
+                self.mark_down(alias, retry_after)
+                continue
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def mark_down(self, alias, retry_after):
+        self._down_until[alias] = time.monotonic() + retry_after
+
+    def reset(self):
+        self._down_until.clear()
+
+
+pool = ReplicaPool()
+
+
+class ReplicaRouter:
+    """Роутер БД: чтение из реплик в контексте replica_reads."""
+
+    def db_for_read(self, model, **hints):
+        if not read_from_replicas.get():
+            return None
+        options = get_routing_settings()
+        replicas = tuple(options['REPLICAS'])
+        alias = pool.choose(replicas, options['RETRY_AFTER'])
+        used = used_replicas.get()
+        if used is not None and alias in replicas:
+            used.add(alias)
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_routing_settings()['REPLICAS']}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def _pin_key(user_id):
+    return f'db_primary:{user_id}'
+
+
+def is_pinned(request):
+    """Клиент недавно изменял данные и должен читать из основной БД."""
+    options = get_routing_settings()
+    if request.COOKIES.get(options['COOKIE_NAME']):
+        return True
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return False
+    return bool(caches[options['CACHE_ALIAS']].get(_pin_key(user.pk)))
+
+
+def pin_to_primary(request, response):
+    """Закрепляет клиента за основной БД на STICKY_SECONDS секунд."""
+    options = get_routing_settings()
+    response.set_cookie(options['COOKIE_NAME'], '1',
+                        max_age=options['STICKY_SECONDS'], httponly=True)
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        caches[options['CACHE_ALIAS']].set(
+            _pin_key(user.pk), True, options['STICKY_SECONDS'])
+
+
+class ReplicaReadMixin:
+    """Безопасные запросы к представлению читают данные из реплик.
+
+    Решение принимается после аутентификации: пользователь запроса всегда
+    читается из основной БД, а закрепление за ней проверяется по нему.
+    При ошибке БД во время чтения из реплик использованные реплики
+    исключаются из выбора, а обработчик повторяется на основной БД.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (request.method in SAFE_METHODS
+                and get_routing_settings()['REPLICAS']
+                and not is_pinned(request)):
+            self._replica_tokens = (read_from_replicas.set(True),
+                                    used_replicas.set(set()))
+
+    def leave_replicas(self):
+        """Переключает чтение на основную БД.
+
+        Возвращает реплики, из которых читал запрос.
+        """
+        tokens = getattr(self, '_replica_tokens', None)
+        if tokens is None:
+            return set()
+        used = used_replicas.get()
+        read_token, used_token = tokens
+        read_from_replicas.reset(read_token)
+        used_replicas.reset(used_token)
+        self._replica_tokens = None
+        return used
+
+    def handle_exception(self, exc):
+        if not isinstance(exc, DatabaseError):
+            return super().handle_exception(exc)
+        used = self.leave_replicas()
+        if not used:
+            return super().handle_exception(exc)
+        retry_after = get_routing_settings()['RETRY_AFTER']
+        for alias in used:
+            pool.mark_down(alias, retry_after)
+        handler = getattr(self, self.request.method.lower(),
+                          self.http_method_not_allowed)
+        try:
+            return handler(self.request, *self.args, **self.kwargs)
+        except Exception as retry_exc:
+            return super().handle_exception(retry_exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        self.leave_replicas()
+        return super().finalize_response(request, response, *args, **kwargs)
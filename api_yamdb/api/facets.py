@@ -0,0 +1,87 @@
+"""Количество произведений по фасетам для фильтров TitleFilter.
+
+GET /titles/facets/?facets=genre,category,year&<фильтры TitleFilter>
+
+Фильтры по жанру, категории и году переводятся в значения индекса
+фасетов (reviews/facets.py) и учитываются пересечением множеств.
+Остальные фильтры (name, search) выполняются одним запросом id.
+"""
+
+from rest_framework.exceptions import ValidationError
+from reviews import facets
+from reviews.cache import get_catalog
+from reviews.models import Category, Genre, Title
+
+from .filters import TitleFilter
+
+FACETS_PARAM = 'facets'
+CATALOG_FACETS = {'genre': Genre, 'category': Category}
+# Значение неизвестного slug: ему не соответствует ни одно произведение
+# (None в индексе - произведения без категории).
+UNKNOWN_VALUE = object()
+# Параметры TitleFilter, не влияющие на набор произведений.
+NON_FILTER_PARAMS = ('ordering',)
+
+
+def parse_facets(params):
+    value = params.get(FACETS_PARAM)
+    if not value:
+        return facets.FACETS
+    names = tuple(name.strip() for name in value.split(','))
+    unknown = set(names) - set(facets.FACETS)
+    if unknown:
+        raise ValidationError({FACETS_PARAM: 'Неизвестные фасеты: '
+                               + ', '.join(sorted(unknown))})
+    return names
+
+
+def get_selection(params):
+    """Выбранные значения фасетов в терминах индекса."""
+    selection = {}
+    for name, model in CATALOG_FACETS.items():
+        slug = params.get(name)
+        if slug:
+            ids = {row['slug']: row['id'] for row in get_catalog(model).rows}
+            selection[name] = ids.get(slug, UNKNOWN_VALUE)
+    year = params.get('year')
+    if year:
+        try:
+            selection['year'] = int(year)
+        except ValueError:
+            raise ValidationError({'year': 'Введите целое число.'})
+    return selection
+
+
+def get_base_ids(params, request):
+    """id произведений по фильтрам, не являющимся фасетами."""
+    data = {name: value for name, value in params.items()
+            if name in TitleFilter.base_filters
+            and name not in facets.FACETS
+            and name not in NON_FILTER_PARAMS}
+    if not data:
+        return None
+    filterset = TitleFilter(data=data, queryset=Title.objects.all(),
+                            request=request)
+    if not filterset.is_valid():
+        raise ValidationError(filterset.errors)
+    return set(filterset.qs.order_by().values_list('id', flat=True))
+
+
+def title_facets(request):
+    """Ответ эндпоинта фасетов произведений."""
+    params = request.query_params
+    names = parse_facets(params)
+    counts = facets.get_counts(get_base_ids(params, request),
+                               get_selection(params))
+    result = {}
+    for name in names:
+        if name in CATALOG_FACETS:
+            result[name] = [
+                {'name': row['name'], 'slug': row['slug'],
+                 'count': counts[name].get(row['id'], 0)}
+                for row in get_catalog(CATALOG_FACETS[name]).rows
+            ]
+        else:
+            result[name] = [{name: value, 'count': count}
+                            for value, count in sorted(counts[name].items())]
+    return result
@@ -1,14 +1,70 @@
-from django_filters.rest_framework import CharFilter, FilterSet
+import math
+
+from django.db.models import F
+from django_filters.constants import EMPTY_VALUES
+from django_filters.rest_framework import (CharFilter, FilterSet, NumberFilter,
+                                           OrderingFilter)
 from reviews.models import Title
+from reviews.search import search_titles
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """Сортировка произведений, например ?ordering=-rating,year,name.
+
+    Произведения без оценок (rating IS NULL) считаются ниже любых
+    оценённых - так NULL упорядочены в индексе SQLite. В конец добавляется
+    id в направлении последнего поля: порядок страниц стабилен, а для
+    одного rating сортировка целиком берётся из индекса.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        ordering = []
+        descending = False
+        for param in value:
+            field = self.get_ordering_value(param)
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            nullable = qs.model._meta.get_field(name).null
+            expression = F(name)
+            if descending:
+                ordering.append(expression.desc(nulls_last=nullable or None))
+            else:
+                ordering.append(expression.asc(nulls_first=nullable or None))
+            if name == 'id':
+                return qs.order_by(*ordering)
+        tiebreaker = F('id').desc() if descending else F('id').asc()
+        return qs.order_by(*ordering, tiebreaker)
 
 
 class TitleFilter(FilterSet):
-    """Фильтр для вьюсета TitleViewSet."""
+    """Фильтр для вьюсета TitleViewSet.
+
+    search - полнотекстовый поиск по названию и описанию с сортировкой
+    по релевантности.
+    rating_min, rating_max - границы (включительно) рейтинга из ответа,
+    то есть средней оценки, округлённой вниз. Фильтры и сортировка по
+    рейтингу используют индексы по сохранённой средней оценке Title.rating.
+    """
 
     name = CharFilter(lookup_expr='icontains')
     genre = CharFilter(field_name='genre__slug')
     category = CharFilter(field_name='category__slug')
+    search = CharFilter(method='filter_search')
+    rating_min = NumberFilter(method='filter_rating_min')
+    rating_max = NumberFilter(method='filter_rating_max')
+    ordering = TitleOrderingFilter(fields=('rating', 'year', 'name'))
 
     class Meta:
         model = Title
         fields = ['year']
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+    def filter_rating_min(self, queryset, name, value):
+        return queryset.filter(rating__gte=math.ceil(value))
+
+    def filter_rating_max(self, queryset, name, value):
+        return queryset.filter(rating__lt=math.floor(value) + 1)
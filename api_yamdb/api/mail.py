@@ -0,0 +1,192 @@
+"""Отправка писем через очередь в БД (outbox).
+
+Запрос только сохраняет письмо в таблицу OutboxEmail; доставка
+выполняется после фиксации транзакции в зависимости от режима
+EMAIL_OUTBOX['MODE']:
+
+- 'thread' - фоновым потоком текущего процесса; поток запускается при
+  старте сервера (см. start_worker), поэтому письма, ожидающие с прошлого
+  запуска, и отложенные повторы доставляются без новых регистраций.
+  Процесс, созданный fork после запуска потока (gunicorn --preload,
+  uwsgi без lazy-apps), запускает свой поток при первом письме;
+- 'worker' - отдельным процессом (python manage.py send_outbox).
+
+Письма отправляются пакетами через одно соединение с почтовым сервером.
+При ошибке попытка повторяется с экспоненциально растущей задержкой.
+Почтовые бэкенды из EAGER_BACKENDS (без сетевого ввода-вывода, например
+locmem в тестах) получают письма сразу после фиксации транзакции.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from reviews.models import OutboxEmail
+
+from .metrics import registry
+
+logger = logging.getLogger('api.mail')
+
+OUTBOX_DEFAULTS = {
+    'MODE': 'thread',
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 30,
+    'MAX_RETRY_DELAY': 60 * 60,
+    'POLL_INTERVAL': 5,
+    'LEASE': 60,
+    'EAGER_BACKENDS': ('django.core.mail.backends.locmem.EmailBackend',),
+}
+
+
+def get_outbox_settings():
+    return {**OUTBOX_DEFAULTS, **getattr(settings, 'EMAIL_OUTBOX', {})}
+
+
+def enqueue_mail(subject, message, from_email, recipient):
+    """Сохраняет письмо в очередь и запускает доставку после коммита."""
+    email = OutboxEmail.objects.create(
+        subject=subject, body=message, from_email=from_email,
+        recipient=recipient)
+    transaction.on_commit(notify_delivery)
+    return email
+
+
+def notify_delivery():
+    options = get_outbox_settings()
+    if settings.EMAIL_BACKEND in options['EAGER_BACKENDS']:
+        deliver_pending()
+    elif options['MODE'] == 'thread':
+        worker.wake()
+
+
+def claim_batch(options):
+    """Забирает пакет писем, готовых к отправке, для этого обработчика."""
+    now = timezone.now()
+    due = OutboxEmail.objects.filter(
+        sent_at=None, attempts__lt=options['MAX_ATTEMPTS'],
+        next_attempt_at__lte=now)
+    ids = list(due.values_list('pk', flat=True)[:options['BATCH_SIZE']])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    due.filter(pk__in=ids).update(
+        lock_token=token,
+        next_attempt_at=now + timedelta(seconds=options['LEASE']))
+    return list(OutboxEmail.objects.filter(lock_token=token, sent_at=None))
+
+
+def deliver_pending():
+    """Отправляет один пакет писем. Возвращает размер пакета."""
+    options = get_outbox_settings()
+    emails = claim_batch(options)
+    if not emails:
+        return 0
+    started = time.perf_counter()
+    sent, failed = [], []
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for email in emails:
+                message = EmailMessage(email.subject, email.body,
+                                       email.from_email, [email.recipient],
+                                       connection=connection)
+                try:
+                    message.send()
+                except Exception as error:
+                    failed.append((email, error))
+                else:
+                    sent.append(email.pk)
+    except Exception as error:
+        # Не удалось открыть соединение: повторяем весь пакет.
+        failed = [(email, error) for email in emails
+                  if email.pk not in sent]
+
+    now = timezone.now()
+    OutboxEmail.objects.filter(pk__in=sent).update(
+        sent_at=now, lock_token='')
+    for email, error in failed:
+        schedule_retry(email, error, now, options)
+    registry.inc('api_outbox_emails_total', (('result', 'sent'),),
+                 len(sent))
+    registry.inc('api_outbox_emails_total', (('result', 'failed'),),
+                 len(failed))
+    registry.observe('api_outbox_batch_seconds', (),
+                     time.perf_counter() - started)
+    return len(emails)
+
+
+def schedule_retry(email, error, now, options):
+    attempts = email.attempts + 1
+    delay = min(options['RETRY_DELAY'] * 2 ** (attempts - 1),
+                options['MAX_RETRY_DELAY'])
+    OutboxEmail.objects.filter(pk=email.pk).update(
+        attempts=attempts, last_error=str(error), lock_token='',
+        next_attempt_at=now + timedelta(seconds=delay))
+    logger.warning('Письмо %s не отправлено (попытка %s): %s',
+                   email.pk, attempts, error)
+
+
+def deliver_all():
+    """Отправляет пакеты, пока в очереди есть готовые письма."""
+    batch_size = get_outbox_settings()['BATCH_SIZE']
+    while deliver_pending() == batch_size:
+        pass
+
+
+class OutboxWorker:
+    """Фоновый поток доставки писем текущего процесса.
+
+    Поток запускается заново в процессе, созданном fork: потоки родителя
+    в нём не выполняются, хотя _thread унаследован.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        if self._pid != os.getpid():
+            self._reset()
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self.run, name='outbox-worker', daemon=True)
+                    self._thread.start()
+        self._event.set()
+
+    def run(self):
+        while True:
+            self._event.wait(get_outbox_settings()['POLL_INTERVAL'])
+            self._event.clear()
+            try:
+                deliver_all()
+            except Exception:
+                logger.exception('Ошибка доставки писем')
+            finally:
+                close_old_connections()
+
+
+worker = OutboxWorker()
+
+
+def start_worker():
+    """Запускает фоновую доставку при старте сервера в режиме 'thread'.
+
+    Вызывается из wsgi.py и asgi.py: их импортируют только процессы,
+    обслуживающие запросы (и runserver), но не команды manage.py и тесты.
+    """
+    if get_outbox_settings()['MODE'] == 'thread':
+        worker.wake()
@@ -0,0 +1,86 @@
+"""
+Сравнение JSONRenderer/JSONParser DRF с ORJSONRenderer/ORJSONParser.
+
+python manage.py bench_json_renderer --titles 1000 --repeat 200
+
+Отрисовывается и разбирается страница списка произведений из --titles
+синтетических записей в формате TitleReadSerializer.
+"""
+
+import io
+import random
+import sys
+import time
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer, orjson
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+RANDOM_SEED = 2023
+WORDS = ('драма', 'комедия', 'побег', 'миля', 'песнь', 'лёд', 'пламя',
+         'звезда', 'ночь', 'город', 'море', 'ветер')
+
+
+class Command(BaseCommand):
+    help = 'Замер скорости отрисовки и разбора JSON: json и orjson.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--titles', type=int, default=1000,
+                            help='Количество произведений на странице')
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='Количество повторов')
+
+    def handle(self, *args, **options) -> None:
+        if orjson is None:
+            raise CommandError('Пакет orjson не установлен.')
+        page: dict = self.make_page(options['titles'])
+        repeat: int = options['repeat']
+
+        expected: bytes = JSONRenderer().render(page)
+        if ORJSONRenderer().render(page) != expected:
+            raise CommandError('Результаты отрисовки различаются.')
+        sys.stdout.write(f'Размер страницы: {len(expected)} байт\n')
+        sys.stdout.write(f'{"операция":<12}{"json, мс":>12}'
+                         f'{"orjson, мс":>12}{"ускорение":>12}\n')
+        for name, before, after in (
+            ('render', lambda: JSONRenderer().render(page),
+             lambda: ORJSONRenderer().render(page)),
+            ('parse', lambda: JSONParser().parse(io.BytesIO(expected)),
+             lambda: ORJSONParser().parse(io.BytesIO(expected))),
+        ):
+            before_ms: float = self.measure(before, repeat)
+            after_ms: float = self.measure(after, repeat)
+            sys.stdout.write(f'{name:<12}{before_ms:>12.3f}'
+                             f'{after_ms:>12.3f}'
+                             f'{before_ms / after_ms:>11.1f}x\n')
+
+    @staticmethod
+    def make_page(count: int) -> dict:
+        """Страница списка произведений в формате API."""
+        rnd = random.Random(RANDOM_SEED)
+        genres = [{'name': word.capitalize(), 'slug': f'genre-{index}'}
+                  for index, word in enumerate(WORDS)]
+        results = [{
+            'id': pk,
+            'genre': rnd.sample(genres, rnd.randint(0, 3)),
+            'category': {'name': 'Фильм', 'slug': 'movie'},
+            'rating': rnd.choice((None, *range(1, 11))),
+            'reviews_count': rnd.randint(0, 500),
+            'name': ' '.join(rnd.sample(WORDS, 3)).capitalize(),
+            'year': rnd.randint(1900, 2023),
+            'description': ' '.join(rnd.choices(WORDS, k=30)),
+        } for pk in range(1, count + 1)]
+        return {'count': count * 10,
+                'next': f'http://localhost/api/v1/titles/?limit={count}'
+                        f'&offset={count}',
+                'previous': None, 'results': results}
+
+    @staticmethod
+    def measure(func, repeat: int) -> float:
+        """Среднее время вызова, мс."""
+        started: float = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat * 1000
@@ -0,0 +1,121 @@
+"""
+Замер конкурентной записи в SQLite без настройки и с SQLITE_TUNING.
+
+python manage.py bench_sqlite_writers --writers 8 --writes 200
+
+Каждый поток в отдельном соединении добавляет отзывы так же, как
+POST /titles/{id}/reviews/: в одной транзакции проверяет уникальность
+отзыва, вставляет его и обновляет счётчики рейтинга произведения.
+База создаётся во временном каталоге.
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from api.sqlite import apply_pragmas, get_sqlite_settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = (
+    'CREATE TABLE title (id INTEGER PRIMARY KEY, rating_sum INTEGER, '
+    'rating_count INTEGER)',
+    'CREATE TABLE review (id INTEGER PRIMARY KEY, title_id INTEGER, '
+    'author_id INTEGER, text TEXT, score INTEGER, '
+    'UNIQUE (title_id, author_id))',
+)
+TITLES = 20
+# Таймаут ожидания блокировки sqlite3 по умолчанию, мс.
+DEFAULT_TIMEOUT = 5000
+
+
+class Command(BaseCommand):
+    help = 'Замер конкурентной записи в SQLite: без настройки и с WAL.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--writers', type=int, default=8,
+                            help='Количество пишущих потоков')
+        parser.add_argument('--writes', type=int, default=200,
+                            help='Количество отзывов от каждого потока')
+
+    def handle(self, *args, **options) -> None:
+        tuned: dict = {**get_sqlite_settings(), 'ENABLED': True}
+        profiles = (
+            ('default', None, 'BEGIN'),
+            ('tuned', tuned, 'BEGIN IMMEDIATE'
+             if tuned['IMMEDIATE_TRANSACTIONS'] else 'BEGIN'),
+        )
+        sys.stdout.write(f'{"профиль":<10}{"записей/с":>12}{"p95, мс":>10}'
+                         f'{"ошибок":>10}\n')
+        for name, pragmas, begin in profiles:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.create_database(path)
+                rate, p95, errors = self.run_writers(
+                    path, pragmas, begin, options['writers'],
+                    options['writes'])
+            sys.stdout.write(f'{name:<10}{rate:>12.0f}{p95:>10.2f}'
+                             f'{errors:>10}\n')
+
+    @staticmethod
+    def create_database(path: str) -> None:
+        with sqlite3.connect(path) as db:
+            for statement in SCHEMA:
+                db.execute(statement)
+            db.executemany('INSERT INTO title VALUES (?, 0, 0)',
+                           [(pk,) for pk in range(1, TITLES + 1)])
+
+    @staticmethod
+    def connect(path: str, pragmas) -> sqlite3.Connection:
+        db = sqlite3.connect(path, timeout=DEFAULT_TIMEOUT / 1000,
+                             isolation_level=None, check_same_thread=False)
+        if pragmas is not None:
+            apply_pragmas(db.cursor(), pragmas)
+        return db
+
+    def run_writers(self, path: str, pragmas, begin: str, writers: int,
+                    writes: int):
+        """Пропускная способность, p95 задержки и количество ошибок."""
+        latencies: list = []
+        errors: list = []
+        barrier = threading.Barrier(writers)
+
+        def write(writer: int) -> None:
+            db = self.connect(path, pragmas)
+            barrier.wait()
+            for number in range(writes):
+                author = writer * writes + number
+                title = author % TITLES + 1
+                started = time.perf_counter()
+                try:
+                    db.execute(begin)
+                    db.execute('SELECT 1 FROM review WHERE title_id = ? '
+                               'AND author_id = ?', (title, author))
+                    db.execute('INSERT INTO review (title_id, author_id, '
+                               'text, score) VALUES (?, ?, ?, ?)',
+                               (title, author, 'text', author % 10 + 1))
+                    db.execute('UPDATE title SET rating_sum = rating_sum + ?,'
+                               ' rating_count = rating_count + 1 '
+                               'WHERE id = ?', (author % 10 + 1, title))
+                    db.execute('COMMIT')
+                except sqlite3.OperationalError:
+                    errors.append(author)
+                    if db.in_transaction:
+                        db.execute('ROLLBACK')
+                else:
+                    latencies.append(time.perf_counter() - started)
+            db.close()
+
+        threads = [threading.Thread(target=write, args=(writer,))
+                   for writer in range(writers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+        return len(latencies) / elapsed, p95, len(errors)
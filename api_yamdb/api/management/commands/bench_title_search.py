@@ -0,0 +1,83 @@
+"""
+Сравнение полнотекстового поиска произведений с фильтром name=icontains.
+
+python manage.py bench_title_search --seed 1000000 --repeat 20
+
+--seed N - добавить в БД N синтетических произведений перед замером
+(используйте отдельную БД: данные не удаляются после замера).
+Для каждого запроса измеряется получение первой страницы и COUNT(*).
+"""
+
+import random
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import Title
+from reviews.search import search_titles
+
+SYLLABLES = ('ба', 'ве', 'ги', 'до', 'жу', 'за', 'ки', 'ло', 'ми', 'ну',
+             'пе', 'ра', 'со', 'ту', 'фа', 'хи', 'че', 'ша', 'ям', 'ор')
+VOCABULARY_SIZE = 20000
+PAGE_SIZE = 10
+SEED_BATCH_SIZE = 10000
+RANDOM_SEED = 2023
+
+
+class Command(BaseCommand):
+    help = 'Замер скорости поиска произведений: icontains и полнотекстовый.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Добавить N синтетических произведений')
+        parser.add_argument('--repeat', type=int, default=10,
+                            help='Количество повторов каждого запроса')
+
+    def handle(self, *args, **options) -> None:
+        rnd = random.Random(RANDOM_SEED)
+        words: list = sorted({
+            ''.join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4)))
+            for _ in range(VOCABULARY_SIZE)})
+        # Одно слово, два слова, начало слова.
+        queries = (rnd.choice(words),
+                   ' '.join(rnd.sample(words, 2)),
+                   rnd.choice(words)[:3])
+        if options['seed']:
+            self.seed_titles(options['seed'], words, rnd)
+        sys.stdout.write(f'Произведений в БД: {Title.objects.count()}\n')
+        sys.stdout.write(f'{"запрос":<16}{"icontains, мс":>16}'
+                         f'{"search, мс":>14}\n')
+        for query in queries:
+            icontains: float = self.measure(
+                lambda: Title.objects.filter(name__icontains=query),
+                options['repeat'])
+            search: float = self.measure(
+                lambda: search_titles(Title.objects.all(), query),
+                options['repeat'])
+            sys.stdout.write(f'{query:<16}{icontains:>16.2f}'
+                             f'{search:>14.2f}\n')
+
+    @staticmethod
+    def measure(get_queryset, repeat: int) -> float:
+        """Среднее время получения страницы и количества, мс."""
+        started: float = time.perf_counter()
+        for _ in range(repeat):
+            queryset = get_queryset()
+            list(queryset[:PAGE_SIZE])
+            queryset.count()
+        return (time.perf_counter() - started) / repeat * 1000
+
+    def seed_titles(self, count: int, words: list,
+                    rnd: random.Random) -> None:
+        """Добавляет синтетические произведения пакетами."""
+        for start in range(0, count, SEED_BATCH_SIZE):
+            size: int = min(SEED_BATCH_SIZE, count - start)
+            with transaction.atomic():
+                Title.objects.bulk_create(
+                    Title(name=' '.join(rnd.sample(words, 3)).capitalize(),
+                          description=' '.join(rnd.choices(words, k=12)),
+                          year=rnd.randint(1900, 2023))
+                    for _ in range(size))
+            sys.stdout.write(
+                self.style.NOTICE(f'Добавлено {start + size} из {count}\n'))
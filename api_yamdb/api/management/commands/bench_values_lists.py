@@ -0,0 +1,76 @@
+"""
+Сравнение списков на сериализаторах DRF и на строках values().
+
+python manage.py bench_values_lists --limit 500 --repeat 20
+
+Замеряется полная обработка запроса (SQL, сериализация и JSON) для
+списка произведений с параметром limit, первой страницы отзывов самого
+обсуждаемого произведения и первой страницы комментариев к отзыву.
+Данные для замера можно создать командой bench_title_search --seed.
+"""
+
+import sys
+import time
+
+from api.views import CommentViewSet, ReviewViewSet, TitleViewSet
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import RequestFactory, override_settings
+from reviews.models import Review, Title
+
+
+class Command(BaseCommand):
+    help = 'Замер скорости списков: сериализаторы DRF и строки values().'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--limit', type=int, default=500,
+                            help='Размер страницы списка произведений')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Количество повторов каждого запроса')
+
+    def handle(self, *args, **options) -> None:
+        if not Title.objects.exists():
+            raise CommandError('В БД нет произведений для замера.')
+        factory = RequestFactory()
+        cases = [('titles', TitleViewSet, {},
+                  factory.get('/api/v1/titles/',
+                              {'limit': options['limit']}))]
+        title = (Title.objects.annotate(n=Count('reviews'))
+                 .order_by('-n').first())
+        review = (Review.objects.annotate(n=Count('comments'))
+                  .order_by('-n').first())
+        if review is not None:
+            cases.append(('reviews', ReviewViewSet, {'title_id': title.id},
+                          factory.get(f'/api/v1/titles/{title.id}/reviews/')))
+            cases.append(('comments', CommentViewSet,
+                          {'title_id': review.title_id,
+                           'review_id': review.id},
+                          factory.get(f'/api/v1/titles/{review.title_id}'
+                                      f'/reviews/{review.id}/comments/')))
+
+        sys.stdout.write(f'{"список":<12}{"serializer, мс":>16}'
+                         f'{"values, мс":>12}{"ускорение":>12}\n')
+        for name, viewset, kwargs, request in cases:
+            view = viewset.as_view({'get': 'list'})
+            timings = {}
+            content = {}
+            for values_lists in (False, True):
+                with override_settings(API_VALUES_LISTS=values_lists):
+                    timings[values_lists], content[values_lists] = (
+                        self.measure(view, request, kwargs,
+                                     options['repeat']))
+            if content[False] != content[True]:
+                raise CommandError(f'Ответы списка {name} различаются.')
+            sys.stdout.write(
+                f'{name:<12}{timings[False]:>16.2f}{timings[True]:>12.2f}'
+                f'{timings[False] / timings[True]:>11.1f}x\n')
+
+    @staticmethod
+    def measure(view, request, kwargs: dict, repeat: int) -> tuple:
+        """Среднее время ответа в мс и тело последнего ответа."""
+        started: float = time.perf_counter()
+        for _ in range(repeat):
+            response = view(request, **kwargs)
+            response.render()
+        elapsed: float = (time.perf_counter() - started) / repeat * 1000
+        return elapsed, response.content
@@ -0,0 +1,34 @@
+"""
+Доставка писем из очереди OutboxEmail отдельным процессом.
+
+python manage.py send_outbox         - отправить готовые письма и выйти;
+python manage.py send_outbox --loop  - работать постоянно.
+"""
+
+import sys
+import time
+
+from api.mail import deliver_all, get_outbox_settings
+from api.metrics import get_metrics_settings, registry
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+
+class Command(BaseCommand):
+    help = 'Отправка писем из очереди исходящих писем.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--loop', action='store_true',
+                            help='Проверять очередь постоянно')
+
+    def handle(self, *args, **options) -> None:
+        while True:
+            deliver_all()
+            metrics_dir = get_metrics_settings()['MULTIPROCESS_DIR']
+            if metrics_dir:
+                registry.flush(metrics_dir)
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(get_outbox_settings()['POLL_INTERVAL'])
+        sys.stdout.write(self.style.SUCCESS('Очередь писем обработана.\n'))
@@ -0,0 +1,222 @@
+"""Метрики запросов к API в формате Prometheus.
+
+Значения хранятся в словарях, принадлежащих потокам: каждый поток пишет
+только в свой словарь, поэтому запись не требует блокировок. При сборе
+метрик словари потоков копируются и суммируются. Словари завершившихся
+потоков (серверы с потоком на запрос) переносятся в общий словарь при
+сборе метрик и появлении нового потока, поэтому их число ограничено
+числом живых потоков.
+
+При нескольких рабочих процессах задайте API_METRICS['MULTIPROCESS_DIR']:
+каждый процесс периодически сохраняет свой снимок в файл этого каталога,
+а эндпоинт /metrics/ суммирует снимки всех процессов.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Имя метрики: (тип, описание, границы корзин гистограммы).
+METRICS = {
+    'api_requests_total': (
+        'counter', 'Количество обработанных запросов.', None),
+    'api_request_duration_seconds': (
+        'histogram', 'Время обработки запроса.', LATENCY_BUCKETS),
+    'api_db_queries': (
+        'histogram', 'Количество SQL-запросов на запрос к API.',
+        QUERY_BUCKETS),
+    'api_outbox_emails_total': (
+        'counter', 'Результаты попыток отправки писем из очереди.', None),
+    'api_outbox_batch_seconds': (
+        'histogram', 'Время отправки пакета писем.', LATENCY_BUCKETS),
+}
+
+METRICS_DEFAULTS = {
+    'ENABLED': True,
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 1.0,
+}
+SNAPSHOT_PREFIX = 'metrics_'
+
+
+def get_metrics_settings():
+    return {**METRICS_DEFAULTS, **getattr(settings, 'API_METRICS', {})}
+
+
+class MetricsRegistry:
+    """Реестр счётчиков и гистограмм с записью без блокировок."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Пары (поток, словарь значений потока).
+        self._shards = []
+        # Значения завершившихся потоков.
+        self._retired = {}
+        self._flushed_at = 0.0
+
+    def _shard(self):
+        shard = getattr(self._local, 'values', None)
+        if shard is None:
+            shard = self._local.values = {}
+            with self._lock:
+                self._retire_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead_shards(self):
+        """Переносит значения завершившихся потоков в _retired.
+
+        Вызывается под self._lock.
+        """
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+                continue
+            for key, value in shard.items():
+                merge_value(self._retired, key, value)
+        self._shards = alive
+
+    def inc(self, name, labels, value=1):
+        """Увеличивает счётчик name с метками labels."""
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        """Добавляет значение в гистограмму name с метками labels."""
+        shard = self._shard()
+        key = (name, labels)
+        buckets = METRICS[name][2]
+        histogram = shard.get(key)
+        if histogram is None:
+            # Счётчики корзин (последняя - +Inf), сумма и количество.
+            histogram = shard[key] = [0] * (len(buckets) + 3)
+        histogram[bisect_left(buckets, value)] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+    def snapshot(self):
+        """Сумма значений всех потоков процесса."""
+        result = {}
+        with self._lock:
+            self._retire_dead_shards()
+            for key, value in self._retired.items():
+                merge_value(result, key, value)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            for key, value in shard.copy().items():
+                merge_value(result, key, value)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._retired.clear()
+            for _, shard in self._shards:
+                shard.clear()
+
+    def flush(self, directory, interval=0.0):
+        """Сохраняет снимок процесса в каталог не чаще раза в interval."""
+        now = time.monotonic()
+        if now - self._flushed_at < interval:
+            return
+        self._flushed_at = now
+        path = os.path.join(directory, f'{SNAPSHOT_PREFIX}{os.getpid()}.json')
+        temp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump([[name, labels, value] for (name, labels), value
+                       in self.snapshot().items()], f)
+        os.replace(temp_path, path)
+
+
+def merge_value(result, key, value):
+    if isinstance(value, list):
+        current = result.get(key)
+        if current is None:
+            result[key] = list(value)
+        else:
+            result[key] = [a + b for a, b in zip(current, value)]
+    else:
+        result[key] = result.get(key, 0) + value
+
+
+def load_snapshots(directory):
+    """Суммирует снимки всех процессов из каталога."""
+    result = {}
+    for file_name in os.listdir(directory):
+        if not (file_name.startswith(SNAPSHOT_PREFIX)
+                and file_name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, file_name),
+                      encoding='utf-8') as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in rows:
+            merge_value(result, (name, tuple(map(tuple, labels))), value)
+    return result
+
+
+def escape_label(value):
+    return (str(value).replace('\\', '\\\\').replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"'
+                          for key, value in pairs) + '}'
+
+
+def render_metrics(values):
+    """Текстовый формат экспозиции Prometheus."""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for (metric, labels), value in sorted(values.items()):
+            if metric != name:
+                continue
+            if kind == 'counter':
+                lines.append(f'{name}{format_labels(labels)} {value}')
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), value):
+                cumulative += count
+                lines.append(f'{name}_bucket'
+                             f'{format_labels(labels, (("le", bound),))} '
+                             f'{cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {value[-2]}')
+            lines.append(f'{name}_count{format_labels(labels)} {value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def metrics_view(request):
+    """Эндпоинт /metrics/."""
+    options = get_metrics_settings()
+    if not options['ENABLED']:
+        raise Http404
+    directory = options['MULTIPROCESS_DIR']
+    if directory:
+        registry.flush(directory)
+        values = load_snapshots(directory)
+    else:
+        values = registry.snapshot()
+    return HttpResponse(render_metrics(values),
+                        content_type='text/plain; version=0.0.4')
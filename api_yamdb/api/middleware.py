@@ -0,0 +1,165 @@
+"""Промежуточные слои (middleware) API."""
+
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from .db_routing import get_routing_settings, pin_to_primary
+from .metrics import get_metrics_settings, registry
+from .profiling import (RequestProfile, current_profile,
+                        install_serializer_timer)
+
+logger = logging.getLogger('api.profiling')
+
+SLOWEST_QUERIES_IN_LOG = 5
+PROFILING_DEFAULTS = {
+    'ENABLED': False,
+    'MAX_QUERIES': 50,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_QUERY_MS': 100,
+}
+
+
+def get_profiling_settings():
+    return {**PROFILING_DEFAULTS, **getattr(settings, 'REQUEST_PROFILING', {})}
+
+
+class RequestProfilingMiddleware:
+    """Замеряет количество и время SQL-запросов, время сериализации и
+    общее время обработки запроса.
+
+    Результаты добавляются в заголовок Server-Timing и пишутся в лог
+    'api.profiling' одной JSON-строкой. Запросы, превысившие пороги из
+    настройки REQUEST_PROFILING, логируются с уровнем WARNING вместе с
+    текстом SQL-запросов.
+    """
+
+    def __init__(self, get_response):
+        self.options = get_profiling_settings()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        # BaseSerializer.data подменяется, только если профилирование
+        # включено.
+        install_serializer_timer()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.execute))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        total_time = time.perf_counter() - started
+
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={profile.sql_time * 1000:.1f};'
+            f'desc="{len(profile.queries)} queries"',
+            f'serializer;dur={profile.serializer_time * 1000:.1f}',
+            f'total;dur={total_time * 1000:.1f}',
+        ))
+        self.log(request, response, profile, total_time)
+        return response
+
+    def log(self, request, response, profile, total_time):
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': len(profile.queries),
+            'sql_ms': round(profile.sql_time * 1000, 1),
+            'serializer_ms': round(profile.serializer_time * 1000, 1),
+            'total_ms': round(total_time * 1000, 1),
+        }
+        slow_queries = [
+            query for query in profile.queries
+            if query[1] * 1000 > self.options['SLOW_QUERY_MS']
+        ]
+        too_many = len(profile.queries) > self.options['MAX_QUERIES']
+        too_slow = total_time * 1000 > self.options['SLOW_REQUEST_MS']
+        if not (slow_queries or too_many or too_slow):
+            logger.info(json.dumps(record, ensure_ascii=False))
+            return
+        if too_many:
+            offending = profile.queries
+        else:
+            offending = slow_queries or sorted(
+                profile.queries, key=lambda query: query[1],
+                reverse=True)[:SLOWEST_QUERIES_IN_LOG]
+        record['offending_sql'] = [
+            {'sql': sql, 'ms': round(duration * 1000, 1)}
+            for sql, duration in offending
+        ]
+        logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+class MetricsMiddleware:
+    """Собирает метрики запросов по именам маршрутов (см. api/metrics.py).
+
+    Для каждого маршрута считаются запросы по методу и статусу ответа,
+    гистограммы времени обработки и количества SQL-запросов.
+    """
+
+    def __init__(self, get_response):
+        self.options = get_metrics_settings()
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        route = (match.url_name or match.view_name) if match else 'unmatched'
+        registry.inc('api_requests_total',
+                     (('route', route), ('method', request.method),
+                      ('status', response.status_code)))
+        registry.observe('api_request_duration_seconds',
+                         (('route', route),), duration)
+        registry.observe('api_db_queries', (('route', route),), queries)
+        if self.options['MULTIPROCESS_DIR']:
+            registry.flush(self.options['MULTIPROCESS_DIR'],
+                           self.options['FLUSH_INTERVAL'])
+        return response
+
+
+class ReadYourWritesMiddleware:
+    """Закрепляет клиента за основной БД после изменения данных.
+
+    Пока клиент закреплён, ReplicaReadMixin не переводит его запросы на
+    реплики (см. api/db_routing.py). Без настроенных реплик отключается.
+    """
+
+    def __init__(self, get_response):
+        if not get_routing_settings()['REPLICAS']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request, response)
+        return response
@@ -0,0 +1,222 @@
+"""Классы пагинации.
+
+Количество объектов для пагинации (поле count) берётся без отдельного
+COUNT(*), если это возможно:
+
+- из кэша по SQL-запросу (см. cached_count);
+- с параметром ?count=false поле count не возвращается, а наличие
+  следующей страницы определяется выборкой limit + 1 строк.
+"""
+
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       LimitOffsetPagination,
+                                       PageNumberPagination)
+
+PAGINATION_COUNT_DEFAULTS = {
+    'ALIAS': 'default',
+    'MAX_AGE': 30,
+    'QUERY_PARAM': 'count',
+}
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def get_pagination_count_settings():
+    return {**PAGINATION_COUNT_DEFAULTS,
+            **getattr(settings, 'PAGINATION_COUNT', {})}
+
+
+def _cache():
+    return caches[get_pagination_count_settings()['ALIAS']]
+
+
+def _version_key(model):
+    return f'count:{model._meta.label_lower}:version'
+
+
+def invalidate_counts(model):
+    """Делает закэшированные количества объектов модели устаревшими."""
+    _cache().set(_version_key(model), time.time_ns(), timeout=None)
+
+
+def cached_count(queryset):
+    """Количество объектов queryset из кэша.
+
+    Ключ строится по SQL-запросу и версии модели, которая меняется при
+    изменении её объектов (см. signals.py). Изменения в обход сигналов
+    (bulk-операции, загрузка данных) учитываются не позднее чем через
+    MAX_AGE секунд.
+    """
+    if not isinstance(queryset, QuerySet):
+        return len(queryset)
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    options = get_pagination_count_settings()
+    cache = caches[options['ALIAS']]
+    version = cache.get_or_set(_version_key(queryset.model), time.time_ns(),
+                               timeout=None)
+    digest = hashlib.md5(f'{version}:{sql}:{params!r}'.encode()).hexdigest()
+    key = f'count:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, options['MAX_AGE'])
+    return count
+
+
+class CountMixin:
+    """Режим подсчёта количества объектов для классов пагинации."""
+
+    def count_requested(self, request):
+        param = get_pagination_count_settings()['QUERY_PARAM']
+        return request.query_params.get(param, '').lower() not in FALSE_VALUES
+
+
+class CountedPaginator(DjangoPaginator):
+    """Paginator с заранее известным количеством объектов."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count = count
+
+
+class ProbePaginator(DjangoPaginator):
+    """Paginator без COUNT(*).
+
+    Страница выбирается вместе с одной следующей строкой, count - нижняя
+    граница количества объектов, достаточная для has_next().
+    """
+
+    number = 1
+
+    @cached_property
+    def rows(self):
+        bottom = (self.number - 1) * self.per_page
+        return list(self.object_list[bottom:bottom + self.per_page + 1])
+
+    @cached_property
+    def count(self):
+        return (self.number - 1) * self.per_page + len(self.rows)
+
+    def page(self, number):
+        try:
+            self.number = max(int(number), 1)
+        except (TypeError, ValueError):
+            pass
+        number = self.validate_number(number)
+        return self._get_page(self.rows[:self.per_page], number, self)
+
+
+class CountedPageNumberPagination(CountMixin, PageNumberPagination):
+    """PageNumberPagination без отдельного COUNT(*)."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.count_requested(request):
+            self.django_paginator_class = partial(
+                CountedPaginator, count=cached_count(queryset))
+        else:
+            self.django_paginator_class = ProbePaginator
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_page_number(self, request, paginator):
+        page_number = request.query_params.get(self.page_query_param, 1)
+        if (page_number in self.last_page_strings
+                and isinstance(paginator, ProbePaginator)):
+            raise NotFound(self.invalid_page_message)
+        return super().get_page_number(request, paginator)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if isinstance(self.page.paginator, ProbePaginator):
+            del response.data['count']
+        return response
+
+
+class CountedLimitOffsetPagination(CountMixin, LimitOffsetPagination):
+    """LimitOffsetPagination без отдельного COUNT(*)."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_omitted = not self.count_requested(request)
+        if not self.count_omitted:
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        # Нижняя граница: next есть, только если выбрана лишняя строка.
+        self.count = self.offset + len(rows)
+        return rows[:self.limit]
+
+    def get_count(self, queryset):
+        return cached_count(queryset)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count_omitted:
+            del response.data['count']
+        return response
+
+
+class PubDateCursorPagination(CursorPagination):
+    """Курсорная (keyset) пагинация по дате публикации.
+
+    Стоимость любой страницы одинакова: вместо COUNT(*) и OFFSET
+    выполняется выборка по индексу (родитель, -pub_date, -id).
+    """
+
+    ordering = ('-pub_date', '-id')
+
+
+class PageOrCursorPagination(BasePagination):
+    """Постраничная пагинация с переключением на курсорную.
+
+    По умолчанию используется PageNumberPagination, параметр запроса
+    ?pagination=cursor включает PubDateCursorPagination.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.paginator = CountedPageNumberPagination()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.mode_query_param) == self.cursor_mode:
+            self.paginator = PubDateCursorPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def get_schema_fields(self, view):
+        return self.paginator.get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        return self.paginator.get_schema_operation_parameters(view)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
@@ -0,0 +1,68 @@
+"""Сбор SQL-запросов и времени обработки запроса.
+
+Профиль текущего запроса хранится в contextvars, его заполняют обёртка
+выполнения SQL (connection.execute_wrapper) и обёртка свойства
+BaseSerializer.data (время сериализации ответа).
+"""
+
+import time
+from contextvars import ContextVar
+
+from rest_framework.serializers import BaseSerializer
+
+current_profile = ContextVar('current_profile', default=None)
+
+
+class RequestProfile:
+    """Статистика обработки одного запроса."""
+
+    __slots__ = ('queries', 'sql_time', 'serializer_time',
+                 '_serializer_depth')
+
+    def __init__(self):
+        self.queries = []
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self._serializer_depth = 0
+
+    def execute(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.sql_time += duration
+            self.queries.append((sql, duration))
+
+    def serialize(self, get_data):
+        """Вызывает get_data, учитывая время только внешнего вызова."""
+        if self._serializer_depth:
+            return get_data()
+        self._serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return get_data()
+        finally:
+            self.serializer_time += time.perf_counter() - started
+            self._serializer_depth -= 1
+
+
+def install_serializer_timer():
+    """Оборачивает BaseSerializer.data для учёта времени сериализации.
+
+    Вызывается при создании RequestProfilingMiddleware, то есть только
+    при включённом профилировании.
+    """
+    data = BaseSerializer.data
+    if getattr(data.fget, 'profiled', False):
+        return
+
+    def timed_data(serializer):
+        profile = current_profile.get()
+        if profile is None:
+            return data.fget(serializer)
+        return profile.serialize(lambda: data.fget(serializer))
+
+    timed_data.profiled = True
+    BaseSerializer.data = property(timed_data)
@@ -0,0 +1,45 @@
+"""Отрисовка ответов в JSON с помощью orjson.
+
+Если пакет orjson не установлен или запрошен вывод с отступами (например,
+в browsable API), используется стандартный JSONRenderer. Результат
+совпадает с выводом JSONRenderer побайтно.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'),
+                   (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson.
+
+    Объекты datetime сериализуются самим orjson в формате DateTimeField
+    (RFC 3339, 'Z' для UTC), остальные типы, неизвестные orjson,
+    передаются кодировщику DRF.
+    """
+
+    def __init__(self):
+        self.default = self.encoder_class().default
+        if orjson is not None:
+            self.options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        if data is None:
+            return b''
+        ret = orjson.dumps(data, default=self.default, option=self.options)
+        # Как и JSONRenderer, экранируем разделители строк U+2028 и U+2029.
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret
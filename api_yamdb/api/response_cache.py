@@ -0,0 +1,218 @@
+"""Кэш готовых ответов API для чтения без прав на запись.
+
+Ответ на GET-запрос сохраняется в кэше RESPONSE_CACHE['ALIAS'] целиком
+(тело и заголовки) и отдаётся без прохода через DRF: без проверки прав,
+запросов к БД и сериализации. Пользователи, которые могут изменять
+данные представления (см. ResponseCacheMixin.bypass_response_cache),
+всегда получают свежий ответ.
+
+Кэшируются только ответы JSON: страницы Browsable API содержат имя
+пользователя и ссылку выхода.
+
+Ключ ответа строится по пути (включает версию API), нормализованным
+параметрам запроса, заголовку Accept и версиям областей (scope) данных.
+Запросы с параметрами, не влияющими на ответ известным образом, не
+кэшируются. Версия области меняется при изменении её данных (см.
+signals.py), поэтому сбрасываются только затронутые ответы.
+
+Если ключа нет в кэше, ответ вычисляет только один запрос (блокировка
+через cache.add), остальные до LOCK_WAIT секунд ждут его результат.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, urlencode
+from rest_framework.exceptions import APIException
+
+RESPONSE_CACHE_DEFAULTS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 60,
+    'LOCK_TIMEOUT': 10,
+    'LOCK_WAIT': 5,
+    'POLL_INTERVAL': 0.05,
+}
+# Параметры пагинации и формата, допустимые для всех представлений.
+COMMON_PARAMS = ('format', 'limit', 'offset', 'page', 'pagination',
+                 'cursor', 'count')
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Vary', 'Allow')
+# Область, версия которой входит в ключи всех ответов.
+GLOBAL_SCOPE = 'all'
+# Форматы ответов, не зависящие от пользователя.
+CACHED_FORMATS = ('json',)
+
+
+def get_response_cache_settings():
+    return {**RESPONSE_CACHE_DEFAULTS,
+            **getattr(settings, 'RESPONSE_CACHE', {})}
+
+
+def _cache():
+    return caches[get_response_cache_settings()['ALIAS']]
+
+
+def _version_key(scope):
+    return f'response:version:{scope}'
+
+
+def get_versions(scopes):
+    """Версии областей scopes (одно обращение к кэшу)."""
+    cache = _cache()
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _bump(scopes):
+    _cache().set_many(
+        {_version_key(scope): time.time_ns() for scope in scopes},
+        timeout=None)
+
+
+def invalidate(*scopes):
+    """Сбрасывает ответы областей scopes.
+
+    Версии меняются сразу и повторно после фиксации транзакции, чтобы
+    параллельный запрос не закэшировал данные до коммита с новой версией.
+    """
+    scopes = [str(scope) for scope in scopes]
+    _bump(scopes)
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def invalidate_all():
+    """Сбрасывает все закэшированные ответы."""
+    invalidate(GLOBAL_SCOPE)
+
+
+class ResponseCacheMixin:
+    """Кэш готовых ответов на GET-запросы к представлению.
+
+    response_cache_scopes() - области данных, от которых зависит ответ
+    (кроме общей GLOBAL_SCOPE);
+    bypass_response_cache(user) - пользователь получает ответ мимо кэша.
+    """
+
+    def response_cache_scopes(self):
+        return ()
+
+    def bypass_response_cache(self, user):
+        return user.is_authenticated
+
+    def get_cache_query_params(self):
+        params = set(COMMON_PARAMS)
+        filterset_class = getattr(self, 'filterset_class', None)
+        if filterset_class is not None:
+            params.update(filterset_class.base_filters)
+        return params
+
+    def initialize_request(self, request, *args, **kwargs):
+        """Запрос DRF, уже аутентифицированный при построении ключа,
+        используется повторно: JWT проверяется один раз."""
+        prepared = self.__dict__.pop('_response_cache_request', None)
+        if prepared is not None and prepared._request is request:
+            return prepared
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_response_cache_key(self, request):
+        """Ключ ответа или None, если ответ не кэшируется."""
+        if request.method != 'GET':
+            return None
+        allowed = self.get_cache_query_params()
+        if any(name not in allowed for name in request.GET):
+            return None
+        drf_request = self.initialize_request(request, *self.args,
+                                              **self.kwargs)
+        try:
+            bypass = self.bypass_response_cache(drf_request.user)
+        except APIException:
+            # Ошибку аутентификации вернёт обычная обработка запроса.
+            return None
+        self._response_cache_request = drf_request
+        if bypass:
+            return None
+        query = urlencode(sorted(
+            (name, sorted(request.GET.getlist(name))) for name in request.GET
+        ), doseq=True)
+        scopes = (GLOBAL_SCOPE, *self.response_cache_scopes())
+        parts = (request.path, query, request.META.get('HTTP_ACCEPT', ''),
+                 *get_versions(scopes))
+        digest = hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+        return f'response:{digest}'
+
+    def dispatch(self, request, *args, **kwargs):
+        options = get_response_cache_settings()
+        self.args, self.kwargs = args, kwargs
+        key = (self.get_response_cache_key(request)
+               if options['ENABLED'] else None)
+        if key is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        cache = caches[options['ALIAS']]
+        entry = cache.get(key)
+        if entry is None:
+            lock_key = f'{key}:lock'
+            if cache.add(lock_key, 1, options['LOCK_TIMEOUT']):
+                try:
+                    return self.dispatch_and_store(
+                        cache, key, options, request, *args, **kwargs)
+                finally:
+                    cache.delete(lock_key)
+            entry = self.wait_for_entry(cache, key, lock_key, options)
+            if entry is None:
+                return self.dispatch_and_store(
+                    cache, key, options, request, *args, **kwargs)
+        return self.cached_response(request, entry)
+
+    def dispatch_and_store(self, cache, key, options, request, *args,
+                           **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        renderer = getattr(response, 'accepted_renderer', None)
+        if (response.status_code == 200 and renderer is not None
+                and renderer.format in CACHED_FORMATS):
+            response.render()
+            cache.set(key, (
+                response.content,
+                [(name, response[name]) for name in CACHED_HEADERS
+                 if response.has_header(name)],
+            ), options['TIMEOUT'])
+        return response
+
+    @staticmethod
+    def wait_for_entry(cache, key, lock_key, options):
+        """Ждёт ответ, который вычисляет другой запрос."""
+        deadline = time.monotonic() + options['LOCK_WAIT']
+        while time.monotonic() < deadline:
+            time.sleep(options['POLL_INTERVAL'])
+            entry = cache.get(key)
+            if entry is not None or cache.get(lock_key) is None:
+                return entry
+        return None
+
+    @staticmethod
+    def cached_response(request, entry):
+        content, headers = entry
+        headers = dict(headers)
+        last_modified = headers.get('Last-Modified')
+        response = get_conditional_response(
+            request, etag=headers.get('ETag'),
+            last_modified=last_modified and parse_http_date_safe(
+                last_modified))
+        if response is None:
+            response = HttpResponse(content)
+        elif response.status_code == 304:
+            headers.pop('Content-Type', None)
+        for name, value in headers.items():
+            response[name] = value
+        response['X-Cache'] = 'HIT'
+        return response
@@ -2,11 +2,14 @@
 
 import datetime as dt
 import re
+from abc import ABC, abstractmethod
 
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.cache import get_catalog
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
 
 MAX_USERNAME_LEN = 150
 MAX_EMAIL_LEN = 50
@@ -112,7 +115,7 @@ class TitleWriteSerializer(serializers.ModelSerializer):
                                             slug_field='slug')
 
     class Meta:
-        fields = ('__all__')
+        fields = ('id', 'genre', 'category', 'name', 'year', 'description')
         model = Title
 
     def validate_year(self, value):
@@ -123,15 +126,39 @@ class TitleWriteSerializer(serializers.ModelSerializer):
 
 
 class TitleReadSerializer(serializers.ModelSerializer):
-    genre = GenreSerializer(many=True)
-    category = CategorySerializer()
-    rating = serializers.IntegerField()
+    """Жанры и категория берутся из кэша справочников.
+
+    Для жанров используются предзагруженные связи genretitle_set.
+    """
+
+    genre = serializers.SerializerMethodField()
+    category = serializers.SerializerMethodField()
+    rating = serializers.IntegerField(read_only=True)
+    reviews_count = serializers.IntegerField(source='rating_count',
+                                             read_only=True)
 
     class Meta:
-        fields = ('__all__')
+        fields = ('id', 'genre', 'category', 'rating', 'reviews_count',
+                  'name', 'year', 'description')
         model = Title
         read_only_fields = ('genre', 'category', 'rating')
 
+    @staticmethod
+    def catalog_item(row):
+        return {'name': row['name'], 'slug': row['slug']}
+
+    def get_genre(self, obj):
+        genre_ids = [link.genre_id for link in obj.genretitle_set.all()]
+        genres = get_catalog(Genre, genre_ids)
+        genre_ids.sort(key=genres.position.get)
+        return [self.catalog_item(genres.by_id[pk]) for pk in genre_ids]
+
+    def get_category(self, obj):
+        if obj.category_id is None:
+            return None
+        categories = get_catalog(Category, (obj.category_id,))
+        return self.catalog_item(categories.by_id[obj.category_id])
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Review."""
@@ -141,7 +168,9 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count')
+        read_only_fields = ('comments_count',)
 
     def create(self, validated_data):
         title = validated_data['title']
@@ -161,3 +190,92 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date')
+
+
+class ValuesSerializer(ABC):
+    """Быстрое представление списка по строкам values().
+
+    Не создаёт экземпляры моделей и полей DRF для каждого объекта, но
+    возвращает те же данные, что и сериализатор serializer_class.
+    values_fields - поля, выбираемые из БД.
+    """
+
+    values_fields = ()
+    pub_date = serializers.DateTimeField()
+
+    def get_rows(self, queryset):
+        return queryset.prefetch_related(None).values(*self.values_fields)
+
+    @abstractmethod
+    def to_representation(self, rows):
+        """Список данных ответа для строк rows."""
+
+
+class TitleValuesSerializer(ValuesSerializer):
+    """Аналог TitleReadSerializer для списка произведений."""
+
+    values_fields = ('id', 'category_id', 'rating', 'rating_count', 'name',
+                     'year', 'description')
+
+    def to_representation(self, rows):
+        genre_ids = {row['id']: [] for row in rows}
+        links = GenreTitle.objects.filter(
+            title_id__in=genre_ids).order_by().values_list(
+            'title_id', 'genre_id')
+        for title_id, genre_id in links:
+            genre_ids[title_id].append(genre_id)
+        genres = get_catalog(
+            Genre, {pk for ids in genre_ids.values() for pk in ids})
+        categories = get_catalog(
+            Category, {row['category_id'] for row in rows} - {None})
+        catalog_item = TitleReadSerializer.catalog_item
+        result = []
+        for row in rows:
+            ids = sorted(genre_ids[row['id']], key=genres.position.get)
+            category_id = row['category_id']
+            result.append({
+                'id': row['id'],
+                'genre': [catalog_item(genres.by_id[pk]) for pk in ids],
+                'category': (None if category_id is None else
+                             catalog_item(categories.by_id[category_id])),
+                'rating': (None if row['rating'] is None
+                           else int(row['rating'])),
+                'reviews_count': row['rating_count'],
+                'name': row['name'],
+                'year': row['year'],
+                'description': row['description'],
+            })
+        return result
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    """Аналог ReviewSerializer для списка отзывов."""
+
+    values_fields = ('id', 'text', 'author__username', 'score', 'pub_date',
+                     'comments_count')
+
+    def to_representation(self, rows):
+        pub_date = self.pub_date.to_representation
+        return [{
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'score': row['score'],
+            'pub_date': pub_date(row['pub_date']),
+            'comments_count': row['comments_count'],
+        } for row in rows]
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    """Аналог CommentSerializer для списка комментариев."""
+
+    values_fields = ('id', 'text', 'author__username', 'pub_date')
+
+    def to_representation(self, rows):
+        pub_date = self.pub_date.to_representation
+        return [{
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'pub_date': pub_date(row['pub_date']),
+        } for row in rows]
@@ -0,0 +1,116 @@
+"""Обработчики сигналов приложения api."""
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+from reviews.signals import data_changed
+
+from . import response_cache
+from .authentication import invalidate_identity
+from .pagination import invalidate_counts
+from .sqlite import configure_connection
+
+connection_created.connect(configure_connection,
+                           dispatch_uid='api_sqlite_tuning')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_identity(sender, instance, **kwargs):
+    """Сбрасывает кэш полей пользователя для аутентификации.
+
+    Повторный сброс после фиксации транзакции не даёт параллельному
+    запросу закэшировать прежние значения.
+    """
+    invalidate_identity(instance.pk)
+    transaction.on_commit(lambda: invalidate_identity(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_responses(sender, instance, created, **kwargs):
+    """Сбрасывает ответы с именами авторов отзывов и комментариев."""
+    if not created:
+        response_cache.invalidate('authors')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title_responses(sender, instance, **kwargs):
+    """Сбрасывает кэш ответов с данными произведения."""
+    response_cache.invalidate('titles', f'title:{instance.pk}',
+                              f'reviews:{instance.pk}')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genre_responses(sender, instance, action, reverse,
+                                     pk_set, **kwargs):
+    """Сбрасывает кэш ответов при изменении жанров произведения."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        response_cache.invalidate('titles', f'title:{instance.pk}')
+    elif pk_set:
+        response_cache.invalidate(
+            'titles', *(f'title:{pk}' for pk in pk_set))
+    else:
+        response_cache.invalidate_all()
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def invalidate_genre_title_responses(sender, instance, **kwargs):
+    """Сбрасывает ответы при изменении связи жанра и произведения."""
+    response_cache.invalidate('titles', f'title:{instance.title_id}')
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_responses(sender, **kwargs):
+    """Сбрасывает кэш ответов, содержащих жанры и категории."""
+    response_cache.invalidate('catalog')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review_responses(sender, instance, **kwargs):
+    """Сбрасывает кэш отзывов и рейтинга произведения."""
+    response_cache.invalidate('titles', f'title:{instance.title_id}',
+                              f'reviews:{instance.title_id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_responses(sender, instance, **kwargs):
+    """Сбрасывает кэш комментариев отзыва и отзывов (счётчик комментариев)
+    произведения."""
+    response_cache.invalidate(f'comments:{instance.review_id}')
+    if Comment.review.is_cached(instance):
+        title_id = instance.review.title_id
+    else:
+        title_id = (Review.objects.filter(pk=instance.review_id)
+                    .values_list('title_id', flat=True).first())
+    if title_id is not None:
+        response_cache.invalidate(f'reviews:{title_id}')
+
+
+@receiver(data_changed)
+def invalidate_all_responses(sender, **kwargs):
+    """Сбрасывает все ответы после массового изменения данных."""
+    response_cache.invalidate_all()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed, sender=Title.genre.through)
+@receiver(data_changed)
+def invalidate_model_counts(sender, **kwargs):
+    """Сбрасывает закэшированные количества объектов для пагинации."""
+    if sender is Title.genre.through:
+        sender = Title
+    if sender._meta.app_label == 'reviews':
+        invalidate_counts(sender)
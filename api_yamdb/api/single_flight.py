@@ -0,0 +1,141 @@
+"""Объединение одновременных одинаковых запросов на чтение (single-flight).
+
+Пока один запрос вычисляет страницу списка, такие же запросы (тот же
+путь, параметры и адрес сервера) того же процесса ждут его результат
+вместо повторного вычисления. Проверка прав и условные ответы
+выполняются для каждого запроса отдельно, объединяется только list.
+
+Клиент, закреплённый за основной БД после записи (см. db_routing.py),
+не присоединяется к чужому вычислению: оно могло начаться до его
+изменения или читать из отстающей реплики.
+
+При SINGLE_FLIGHT['SHARED'] запросы объединяются и между процессами:
+вычисляющий запрос берёт блокировку в кэше ALIAS и сохраняет результат
+на RESULT_TIMEOUT секунд, запросы других процессов ждут его до WAIT
+секунд. Если результат не дождались, запрос вычисляет его сам.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .db_routing import get_routing_settings, is_pinned
+
+SINGLE_FLIGHT_DEFAULTS = {
+    'ENABLED': True,
+    'SHARED': False,
+    'ALIAS': 'default',
+    'WAIT': 5,
+    'RESULT_TIMEOUT': 1,
+    'LOCK_TIMEOUT': 10,
+    'POLL_INTERVAL': 0.02,
+}
+
+
+def get_single_flight_settings():
+    return {**SINGLE_FLIGHT_DEFAULTS, **getattr(settings, 'SINGLE_FLIGHT', {})}
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'failed')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+class SingleFlight:
+    """Группа вызовов, объединяемых по ключу внутри процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, timeout):
+        """Результат func() и признак того, что он получен от другого
+        вызова. Если первый вызов завершился ошибкой или не уложился
+        в timeout, func вызывается повторно."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            if call.done.wait(timeout) and not call.failed:
+                return call.result, True
+            return func(), False
+        try:
+            call.result = func()
+        except BaseException:
+            call.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+group = SingleFlight()
+
+
+def shared_do(key, func, options):
+    """Объединение вызовов между процессами через общий кэш."""
+    cache = caches[options['ALIAS']]
+    result_key, lock_key = f'{key}:result', f'{key}:lock'
+    result = cache.get(result_key)
+    if result is not None:
+        return result
+    if cache.add(lock_key, 1, options['LOCK_TIMEOUT']):
+        try:
+            result = func()
+            cache.set(result_key, result, options['RESULT_TIMEOUT'])
+            return result
+        finally:
+            cache.delete(lock_key)
+    deadline = time.monotonic() + options['WAIT']
+    while time.monotonic() < deadline:
+        time.sleep(options['POLL_INTERVAL'])
+        result = cache.get(result_key)
+        if result is not None:
+            return result
+        if cache.get(lock_key) is None:
+            break
+    return func()
+
+
+class SingleFlightListMixin:
+    """Объединяет одновременные одинаковые запросы к list."""
+
+    def get_single_flight_key(self, request):
+        query = sorted(request.query_params.lists())
+        parts = (type(self).__name__, request.scheme, request.get_host(),
+                 request.path, query)
+        digest = hashlib.md5(repr(parts).encode()).hexdigest()
+        return f'single_flight:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        options = get_single_flight_settings()
+        if (not options['ENABLED']
+                or get_routing_settings()['REPLICAS'] and is_pinned(request)):
+            return super().list(request, *args, **kwargs)
+
+        def compute():
+            response = super(SingleFlightListMixin, self).list(
+                request, *args, **kwargs)
+            return response.data, response.status_code
+
+        key = self.get_single_flight_key(request)
+        if options['SHARED']:
+            result, _ = group.do(
+                key, lambda: shared_do(key, compute, options),
+                options['WAIT'])
+        else:
+            result, _ = group.do(key, compute, options['WAIT'])
+        data, status = result
+        return Response(data, status=status)
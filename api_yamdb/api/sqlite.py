@@ -0,0 +1,85 @@
+"""Настройка соединений SQLite для работы под нагрузкой.
+
+При SQLITE_TUNING['ENABLED'] каждое новое соединение с SQLite получает
+PRAGMA из настройки (обработчик сигнала connection_created):
+
+- journal_mode=WAL - чтение не блокируется записью и наоборот;
+- synchronous=NORMAL - в режиме WAL fsync только при контрольной точке;
+- mmap_size, cache_size - чтение страниц через отображение в память
+  и увеличенный кэш страниц соединения;
+- busy_timeout - ожидание блокировки вместо ошибки 'database is locked'.
+
+При IMMEDIATE_TRANSACTIONS транзакции начинаются с BEGIN IMMEDIATE:
+блокировка записи берётся в начале транзакции. Иначе транзакция,
+которая сначала читает, а потом пишет, при конкурентной записи
+завершается ошибкой 'database is locked' сразу, без учёта busy_timeout.
+Django 3.2 не позволяет задать режим транзакций настройкой, поэтому
+заменяется внутренний метод DatabaseWrapper (см. configure_connection).
+"""
+
+import types
+
+import django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Версия Django, внутренности DatabaseWrapper которой заменяет
+# IMMEDIATE_TRANSACTIONS.
+PATCHED_DJANGO_VERSION = (3, 2)
+
+SQLITE_TUNING_DEFAULTS = {
+    'ENABLED': False,
+    'JOURNAL_MODE': 'WAL',
+    'SYNCHRONOUS': 'NORMAL',
+    'MMAP_SIZE': 256 * 1024 * 1024,
+    # Отрицательное значение - размер в КиБ, а не в страницах.
+    'CACHE_SIZE': -64 * 1024,
+    'BUSY_TIMEOUT': 5000,
+    'IMMEDIATE_TRANSACTIONS': True,
+}
+
+
+def get_sqlite_settings():
+    return {**SQLITE_TUNING_DEFAULTS, **getattr(settings, 'SQLITE_TUNING', {})}
+
+
+def tuning_pragmas(options):
+    """Список PRAGMA для настроек options."""
+    return [
+        f'PRAGMA journal_mode={options["JOURNAL_MODE"]}',
+        f'PRAGMA synchronous={options["SYNCHRONOUS"]}',
+        f'PRAGMA mmap_size={int(options["MMAP_SIZE"])}',
+        f'PRAGMA cache_size={int(options["CACHE_SIZE"])}',
+        f'PRAGMA busy_timeout={int(options["BUSY_TIMEOUT"])}',
+    ]
+
+
+def apply_pragmas(cursor, options):
+    for pragma in tuning_pragmas(options):
+        cursor.execute(pragma)
+
+
+def _begin_immediate(connection):
+    connection.cursor().execute('BEGIN IMMEDIATE')
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    if connection.vendor != 'sqlite':
+        return
+    options = get_sqlite_settings()
+    if not options['ENABLED']:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, options)
+    if options['IMMEDIATE_TRANSACTIONS']:
+        # Замена зависит от внутреннего метода Django 3.2. С Django 5.1
+        # вместо неё задайте DATABASES[...]['OPTIONS']['transaction_mode']
+        # = 'IMMEDIATE'.
+        if django.VERSION[:2] != PATCHED_DJANGO_VERSION:
+            raise ImproperlyConfigured(
+                'SQLITE_TUNING["IMMEDIATE_TRANSACTIONS"] поддерживается '
+                'только в Django 3.2; в Django 5.1+ используйте '
+                'OPTIONS["transaction_mode"] = "IMMEDIATE".')
+        connection._start_transaction_under_autocommit = types.MethodType(
+            _begin_immediate, connection)
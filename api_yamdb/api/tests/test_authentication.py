@@ -0,0 +1,82 @@
+from api.authentication import get_token
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from reviews.models import User
+
+
+class TestCachedJWTAuthentication(APITestCase):
+    """Пользователь запроса берётся из кэша, а не из БД."""
+
+    def setUp(self):
+        caches['users'].clear()
+        self.admin = User.objects.create_user(
+            username='jwt_admin', email='jwt_admin@example.com',
+            role=User.ADMIN)
+        self.user = User.objects.create_user(
+            username='jwt_user', email='jwt_user@example.com')
+        self.admin_client = self.client_for(self.admin)
+        self.user_client = self.client_for(self.user)
+
+    @staticmethod
+    def client_for(user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_token(user)}')
+        return client
+
+    def test_user_is_not_queried_on_repeated_requests(self):
+        """Повторный запрос не читает пользователя из БД."""
+        url = reverse('api:user-list')
+        self.admin_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('FROM "reviews_user" WHERE' in query['sql']
+                             and '"reviews_user"."id" =' in query['sql']
+                             for query in context.captured_queries))
+
+    def test_role_change_invalidates_cache(self):
+        """Изменение роли сразу меняет права пользователя."""
+        url = reverse('api:user-list')
+        self.assertEqual(self.user_client.get(url).status_code,
+                         status.HTTP_403_FORBIDDEN)
+        response = self.admin_client.patch(
+            reverse('api:user-detail', args=[self.user.username]),
+            data={'role': User.ADMIN})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user_client.get(url).status_code,
+                         status.HTTP_200_OK)
+
+    def test_inactive_user_is_rejected(self):
+        """Деактивированный пользователь не проходит аутентификацию."""
+        url = reverse('api:userme')
+        self.assertEqual(self.user_client.get(url).status_code,
+                         status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.user_client.get(url).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+    def test_userme_returns_full_profile(self):
+        """Профиль читается целиком, а не из полей кэша."""
+        self.user.bio = 'bio'
+        self.user.save()
+        response = self.user_client.get(reverse('api:userme'))
+        self.assertEqual(response.data['bio'], 'bio')
+        self.assertEqual(response.data['email'], self.user.email)
+
+    @override_settings(JWT_USER_CACHE={'ALIAS': 'users',
+                                       'TRUST_TOKEN_CLAIMS': True})
+    def test_trusted_claims_skip_cache_and_database(self):
+        """С TRUST_TOKEN_CLAIMS роль берётся из токена."""
+        url = reverse('api:user-list')
+        with CaptureQueriesContext(connection) as context:
+            response = self.admin_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(caches['users'].get(f'jwt_user:{self.admin.pk}'))
+        self.assertFalse(any('"reviews_user"."id" =' in query['sql']
+                             for query in context.captured_queries))
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from reviews import cache
+from reviews.checks import check_shared_cache
+from reviews.models import Genre
+
+
+class TestCatalogCache(TestCase):
+    """Снимки справочников и требования к общему кэшу."""
+
+    def setUp(self):
+        cache._shared_cache().clear()
+        cache._local.clear()
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=60)
+    def test_snapshot_expires_without_version_change(self):
+        """Изменение, версия которого не дошла до процесса, видно не
+        позже чем через CATALOG_CACHE_TIMEOUT секунд."""
+        now = 1000.0
+        with mock.patch('reviews.cache.time.time', lambda: now):
+            self.assertEqual(cache.get_catalog(Genre).rows, ())
+            # Запись в обход сигналов: версия справочника не меняется.
+            Genre.objects.bulk_create([Genre(name='Драма', slug='drama')])
+            with self.assertNumQueries(0):
+                self.assertEqual(cache.get_catalog(Genre).rows, ())
+            now += 60
+            with self.assertNumQueries(1):
+                rows = cache.get_catalog(Genre).rows
+        self.assertEqual([row['slug'] for row in rows], ['drama'])
+
+    def test_version_changes_again_after_commit(self):
+        """Снимок, прочитанный до фиксации изменения, не остаётся
+        под новой версией."""
+        with self.captureOnCommitCallbacks(execute=True):
+            Genre.objects.create(name='Драма', slug='drama')
+            uncommitted_version = cache.get_version(Genre)
+        self.assertNotEqual(cache.get_version(Genre), uncommitted_version)
+
+    def test_deploy_check_requires_shared_cache(self):
+        errors = check_shared_cache(None)
+        self.assertEqual([error.id for error in errors], ['reviews.E001'])
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.'
+                           'FileBasedCache',
+                'LOCATION': '/tmp/api_yamdb_test_cache'}}):
+            self.assertEqual(check_shared_cache(None), [])
@@ -1,3 +1,7 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
@@ -104,6 +108,93 @@ class TestMyAPI(APITestCase):
                 self.assertEqual(response.status_code,
                                  expected_status_code)
 
+    def test_foreign_parent_returns_not_found(self):
+        """Отзыв чужого или несуществующего произведения - ошибка 404."""
+        other_title = Title.objects.create(
+            name='other_title', category=self.category, year=2020)
+        parents = (
+            {'title_id': other_title.id, 'review_id': self.review.id},
+            {'title_id': self.title.id, 'review_id': 0},
+            {'title_id': 0, 'review_id': self.review.id},
+        )
+        for kwargs in parents:
+            with self.subTest(kwargs=kwargs):
+                url = reverse('api:comments-list', kwargs=kwargs)
+                self.assertEqual(self.anon_client.get(url).status_code,
+                                 status.HTTP_404_NOT_FOUND)
+                response = self.user_client.post(url, {'text': 'comment'})
+                self.assertEqual(response.status_code,
+                                 status.HTTP_404_NOT_FOUND)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_comments_count_follows_changes(self):
+        """Счётчики комментариев и отзывов отдаются в API и меняются при
+        создании и удалении, в том числе каскадном."""
+        url = reverse('api:comments-list',
+                      kwargs={'title_id': self.title.id,
+                              'review_id': self.review.id})
+        commentator = User.objects.create_user(
+            username='commentator', password='password',
+            email='commentator@example.com')
+        client = APIClient()
+        client.force_authenticate(commentator)
+        client.post(url, {'text': 'comment_2'})
+        self.moderator_client.post(url, {'text': 'comment_3'})
+        review_url = reverse('api:reviews-detail',
+                             kwargs={'title_id': self.title.id,
+                                     'pk': self.review.id})
+        response = self.anon_client.get(review_url)
+        self.assertEqual(response.json()['comments_count'], 3)
+        title_url = reverse('api:title-detail', kwargs={'pk': self.title.id})
+        response = self.anon_client.get(title_url)
+        self.assertEqual(response.json()['reviews_count'], 1)
+
+        commentator.delete()
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.comments_count, 2)
+
+        Comment.objects.filter(author=self.moderator).get().delete()
+        self.review.refresh_from_db()
+        self.assertEqual(self.review.comments_count, 1)
+
+    def test_rebuild_counters_fixes_drift(self):
+        """Команда rebuild_counters находит и исправляет расхождения."""
+        Review.objects.filter(pk=self.review.pk).update(comments_count=10)
+        Title.objects.filter(pk=self.title.pk).update(rating_count=5)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_counters', '--check', stdout=StringIO())
+
+        call_command('rebuild_counters', stdout=StringIO())
+        self.review.refresh_from_db()
+        self.title.refresh_from_db()
+        self.assertEqual(self.review.comments_count, 1)
+        self.assertEqual(self.title.rating_count, 1)
+        call_command('rebuild_counters', '--check', stdout=StringIO())
+
+    @override_settings(RESPONSE_CACHE={'ENABLED': False})
+    def test_conditional_get_follows_author_rename(self):
+        """Переименование автора меняет ETag отзывов и комментариев."""
+        urls = (
+            reverse('api:reviews-list',
+                    kwargs={'title_id': self.title.id}),
+            reverse('api:comments-list',
+                    kwargs={'title_id': self.title.id,
+                            'review_id': self.review.id}),
+            reverse('api:comments-detail',
+                    kwargs={'title_id': self.title.id,
+                            'review_id': self.review.id,
+                            'pk': self.comment.id}),
+        )
+        etags = [self.anon_client.get(url)['ETag'] for url in urls]
+        author = User.objects.get(pk=self.user.pk)
+        author.username = 'renamed_author'
+        author.save()
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('renamed_author', response.content.decode())
+
     def test_anon_user_cant_post_comments(self):
         """Комметировать может только авторизованный пользователь."""
         data = {
@@ -0,0 +1,128 @@
+from unittest import mock
+
+from api.db_routing import (ReplicaPool, ReplicaRouter, pool,
+                            read_from_replicas, used_replicas)
+from api.views import ReviewViewSet
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from reviews.models import Category, Title, User
+
+REPLICAS = ('replica1', 'replica2')
+
+
+class TestReplicaRouter(SimpleTestCase):
+    """Выбор БД для чтения."""
+
+    def setUp(self):
+        self.connections = {alias: mock.Mock() for alias in REPLICAS}
+        patcher = mock.patch('api.db_routing.connections', self.connections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        pool.reset()
+        self.addCleanup(pool.reset)
+        self.router = ReplicaRouter()
+
+    def read_db(self):
+        token = read_from_replicas.set(True)
+        try:
+            return self.router.db_for_read(Title)
+        finally:
+            read_from_replicas.reset(token)
+
+    @override_settings(DATABASE_ROUTING={'REPLICAS': REPLICAS})
+    def test_replicas_are_used_round_robin(self):
+        """Реплики выбираются по очереди, запись идёт в основную БД."""
+        self.assertEqual({self.read_db(), self.read_db()}, set(REPLICAS))
+        self.assertEqual(self.router.db_for_write(Title), 'default')
+
+    @override_settings(DATABASE_ROUTING={'REPLICAS': REPLICAS})
+    def test_reads_outside_context_use_default_routing(self):
+        """Без контекста чтения из реплик роутер не выбирает БД."""
+        self.assertIsNone(self.router.db_for_read(Title))
+
+    @override_settings(DATABASE_ROUTING={'REPLICAS': REPLICAS,
+                                         'RETRY_AFTER': 30})
+    def test_unavailable_replica_is_skipped(self):
+        """Недоступная реплика исключается, без реплик читаем из default."""
+        self.connections['replica1'].ensure_connection.side_effect = (
+            OperationalError)
+        self.assertEqual({self.read_db() for _ in range(4)}, {'replica2'})
+        self.assertEqual(
+            self.connections['replica1'].ensure_connection.call_count, 1)
+
+        self.connections['replica2'].ensure_connection.side_effect = (
+            OperationalError)
+        self.assertEqual(self.read_db(), 'default')
+
+    def test_pool_recovers_after_retry_delay(self):
+        """Реплика возвращается в выбор после RETRY_AFTER секунд."""
+        replica_pool = ReplicaPool()
+        replica_pool.mark_down('replica1', retry_after=0)
+        self.assertEqual(replica_pool.choose(('replica1',), 30), 'replica1')
+
+
+@override_settings(DATABASE_ROUTING={'REPLICAS': ('default',)})
+class TestReplicaReads(APITestCase):
+    """Безопасные запросы к представлениям читают из реплик."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='replica_user', email='replica_user@example.com')
+        category = Category.objects.create(name='c', slug='replica_c')
+        cls.title = Title.objects.create(name='t', year=2000,
+                                         category=category)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        patcher = mock.patch.object(pool, 'choose', wraps=pool.choose)
+        self.choose = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_safe_requests_read_from_replicas(self):
+        """GET читает из реплики, после записи клиент читает из default."""
+        url = reverse('api:reviews-list', args=[self.title.pk])
+        self.assertEqual(self.client.get(url).status_code,
+                         status.HTTP_200_OK)
+        self.assertTrue(self.choose.called)
+
+        self.choose.reset_mock()
+        response = self.client.post(url, data={'text': 'text', 'score': 5})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('db_primary', response.cookies)
+        self.assertFalse(self.choose.called)
+
+        # Клиент без cookie закреплён за default по id пользователя.
+        other_client = APIClient()
+        other_client.force_authenticate(self.user)
+        response = other_client.get(url)
+        self.assertEqual(response.data['count'], 1)
+        self.assertFalse(self.choose.called)
+
+    def test_replica_failure_mid_request_falls_back_to_primary(self):
+        """Ошибка реплики после подключения исключает её из выбора,
+        а запрос повторяется на основной БД."""
+        self.addCleanup(pool.reset)
+        get_queryset = ReviewViewSet.get_queryset
+        failures = [OperationalError('replica lost')]
+
+        def flaky_get_queryset(view):
+            queryset = get_queryset(view)
+            if failures and read_from_replicas.get():
+                raise failures.pop()
+            return queryset
+
+        url = reverse('api:reviews-list', args=[self.title.pk])
+        with mock.patch.object(ReviewViewSet, 'get_queryset',
+                               flaky_get_queryset):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(failures, [])
+        self.assertEqual(pool.choose(('default',), 30), 'default')
+        self.assertIn('default', pool._down_until)
+        self.assertFalse(read_from_replicas.get())
+        self.assertIsNone(used_replicas.get())
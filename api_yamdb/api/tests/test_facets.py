@@ -0,0 +1,142 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from reviews import facets
+from reviews.models import Category, Genre, Title
+
+
+class TestTitleFacets(APITestCase):
+    """Количество произведений по жанрам, категориям и годам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.movie = Category.objects.create(name='Фильм', slug='movie')
+        cls.book = Category.objects.create(name='Книга', slug='book')
+        cls.drama = Genre.objects.create(name='Драма', slug='drama')
+        cls.comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        for name, category, year, genres in (
+            ('Побег', cls.movie, 1994, [cls.drama]),
+            ('Миля', cls.movie, 1999, [cls.drama, cls.comedy]),
+            ('Ревизор', cls.book, 1836, [cls.comedy]),
+        ):
+            title = Title.objects.create(name=name, category=category,
+                                         year=year)
+            title.genre.set(genres)
+
+    def setUp(self):
+        facets.invalidate()
+        self.client = APIClient()
+        self.url = reverse('api:title-facets')
+
+    @staticmethod
+    def counts(data, facet, key='slug'):
+        return {item[key]: item['count'] for item in data[facet]}
+
+    def test_facets_without_filters(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counts(response.data, 'genre'),
+                         {'drama': 2, 'comedy': 2})
+        self.assertEqual(self.counts(response.data, 'category'),
+                         {'movie': 2, 'book': 1})
+        self.assertEqual(self.counts(response.data, 'year', 'year'),
+                         {1836: 1, 1994: 1, 1999: 1})
+
+    def test_facets_respect_selection(self):
+        """Выбор фасета ограничивает остальные фасеты, но не его самого."""
+        response = self.client.get(
+            self.url, {'genre': 'comedy', 'facets': 'genre,category'})
+        self.assertEqual(set(response.data), {'genre', 'category'})
+        self.assertEqual(self.counts(response.data, 'genre'),
+                         {'drama': 2, 'comedy': 2})
+        self.assertEqual(self.counts(response.data, 'category'),
+                         {'movie': 1, 'book': 1})
+
+        response = self.client.get(self.url, {'name': 'ил', 'year': 1999})
+        self.assertEqual(self.counts(response.data, 'genre'),
+                         {'drama': 1, 'comedy': 1})
+        self.assertEqual(self.counts(response.data, 'year', 'year'),
+                         {1836: 0, 1994: 0, 1999: 1})
+
+    def test_unknown_slug_matches_nothing(self):
+        """Неизвестный slug не выбирает произведения без категории."""
+        title = Title.objects.create(name='Без категории', year=2000)
+        title.genre.set([self.drama])
+        response = self.client.get(self.url, {'category': 'nope'})
+        self.assertEqual(self.counts(response.data, 'genre'),
+                         {'drama': 0, 'comedy': 0})
+        self.assertEqual(set(self.counts(response.data, 'year', 'year')
+                             .values()), {0})
+
+    def test_ordering_is_not_a_filter(self):
+        """Параметр ordering не выполняет запрос id произведений."""
+        facets.get_counts()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'ordering': '-rating'})
+        self.assertEqual(self.counts(response.data, 'genre'),
+                         {'drama': 2, 'comedy': 2})
+        self.assertFalse(any('reviews_title' in query['sql']
+                             for query in context.captured_queries))
+
+    def test_unknown_facet(self):
+        response = self.client.get(self.url, {'facets': 'genre,rating'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_is_updated_incrementally(self):
+        """Изменения применяются к индексу без его перестроения."""
+        facets.get_counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            title = Title.objects.create(name='Нос', category=self.book,
+                                         year=1836)
+            title.genre.set([self.comedy])
+        with self.assertNumQueries(0):
+            counts = facets.get_counts()
+        self.assertEqual(counts['genre'][self.comedy.pk], 3)
+        self.assertEqual(counts['year'][1836], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movie.delete()
+            title.delete()
+        with self.assertNumQueries(0):
+            counts = facets.get_counts()
+        self.assertEqual(counts['category'], {None: 2, self.book.pk: 1})
+        self.assertEqual(counts['genre'][self.comedy.pk], 2)
+
+    def test_other_process_changes_are_replayed(self):
+        """Изменения другого процесса применяются из журнала без
+        перестроения индекса."""
+        facets.get_counts()
+        # У «другого процесса» своего индекса нет: он только пишет журнал.
+        with mock.patch.object(facets, '_index', None):
+            with self.captureOnCommitCallbacks(execute=True):
+                title = Title.objects.create(name='Нос', category=self.book,
+                                             year=1836)
+                title.genre.set([self.drama, self.comedy])
+            with self.captureOnCommitCallbacks(execute=True):
+                title.genre.clear()
+        with self.assertNumQueries(0):
+            counts = facets.get_counts()
+        self.assertEqual(counts['category'][self.book.pk], 2)
+        self.assertEqual(counts['genre'],
+                         {self.drama.pk: 2, self.comedy.pk: 2})
+
+        # Записи журнала нет: индекс перестраивается.
+        with mock.patch.object(facets, '_index', None):
+            with self.captureOnCommitCallbacks(execute=True):
+                title.delete()
+        facets._shared_cache().delete(
+            facets._change_key(facets._current_version()))
+        with self.assertNumQueries(2):
+            counts = facets.get_counts()
+        self.assertEqual(counts['category'][self.book.pk], 1)
+
+    @override_settings(FACET_INDEX={'MAX_AGE': 0})
+    def test_index_is_rebuilt_after_max_age(self):
+        facets.get_counts()
+        with self.assertNumQueries(2):
+            facets.get_counts()
@@ -0,0 +1,43 @@
+import filecmp
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from reviews.aggregates import find_comment_count_drift, find_rating_drift
+from reviews.models import Comment, GenreTitle, Review, Title, User
+
+
+class TestGenerateData(TestCase):
+    """Генерация синтетического набора данных."""
+
+    options = {'users': 30, 'titles': 20, 'reviews': 200, 'comments': 400,
+               'seed': 7, 'stdout': StringIO()}
+
+    def test_generate_into_database(self):
+        call_command('generate_data', **self.options)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Title.objects.count(), 20)
+        self.assertEqual(Review.objects.count(), 200)
+        self.assertGreater(Comment.objects.count(), 0)
+        self.assertTrue(GenreTitle.objects.exists())
+        self.assertEqual(find_rating_drift(), [])
+        self.assertEqual(find_comment_count_drift(), [])
+        counts = sorted(Title.objects.values_list('rating_count', flat=True),
+                        reverse=True)
+        self.assertGreater(counts[0], counts[len(counts) // 2])
+
+        with self.assertRaises(CommandError):
+            call_command('generate_data', **self.options)
+
+    def test_csv_is_reproducible(self):
+        with tempfile.TemporaryDirectory() as first, \
+                tempfile.TemporaryDirectory() as second:
+            call_command('generate_data', csv=first, **self.options)
+            call_command('generate_data', csv=second, **self.options)
+            files = sorted(os.listdir(first))
+            self.assertIn('review.csv', files)
+            _, mismatch, errors = filecmp.cmpfiles(first, second, files,
+                                                   shallow=False)
+            self.assertEqual(mismatch + errors, [])
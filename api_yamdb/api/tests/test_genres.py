@@ -109,3 +109,20 @@ class TestMyAPI(APITestCase):
 
         response = self.superuser_client.delete(url)
         self.assertEqual(response.status_code, 404)
+
+    def test_genres_list_cache_invalidation(self):
+        """Кэшированный список жанров обновляется при изменении жанров."""
+
+        url = reverse('api:genre-list')
+        response = self.anon_client.get(url)
+        count = response.json()['count']
+
+        genre = Genre.objects.create(name='new_genre', slug='new_genre')
+        response = self.anon_client.get(url, {'limit': 100})
+        self.assertEqual(response.json()['count'], count + 1)
+        self.assertIn({'name': 'new_genre', 'slug': 'new_genre'},
+                      response.json()['results'])
+
+        genre.delete()
+        response = self.anon_client.get(url)
+        self.assertEqual(response.json()['count'], count)
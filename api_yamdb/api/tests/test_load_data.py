@@ -0,0 +1,47 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase
+from reviews.models import Genre, GenreTitle, Review, Title
+
+
+class TestLoadData(TestCase):
+    """Загрузка CSV командами load_data и load_all_data."""
+
+    def test_load_all_data(self):
+        call_command('load_all_data',
+                     os.path.join(settings.BASE_DIR, 'static', 'data'),
+                     stdout=StringIO())
+        self.assertTrue(Title.objects.exists())
+        self.assertTrue(GenreTitle.objects.exists())
+        self.assertTrue(Review.objects.exists())
+
+    def load_genre_titles(self, **options):
+        title = Title.objects.create(name='Побег', year=1994)
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'genre_title.csv')
+            with open(path, 'w', encoding='UTF-8') as f:
+                f.write(f'id,title_id,genre_id\n'
+                        f'1,{title.pk},{genre.pk}\n'
+                        f'2,{title.pk},{genre.pk + 1000}\n')
+            call_command('load_data', 'GenreTitle', path, stream=True,
+                         stdout=StringIO(), **options)
+
+    def test_missing_keys_are_skipped(self):
+        self.load_genre_titles()
+        self.assertEqual(GenreTitle.objects.count(), 1)
+
+    def test_deferred_checks_leave_keys_to_database(self):
+        """С --deferred-checks внешние ключи проверяет БД при фиксации."""
+        self.load_genre_titles(deferred_checks=True)
+        self.assertEqual(GenreTitle.objects.count(), 2)
+        with self.assertRaises(IntegrityError):
+            connection.check_constraints(
+                table_names=[GenreTitle._meta.db_table])
+        # TestCase проверяет ограничения перед откатом транзакции теста.
+        GenreTitle.objects.filter(pk=2).delete()
@@ -0,0 +1,63 @@
+from smtplib import SMTPException
+from unittest import mock
+
+from api.mail import OutboxWorker, deliver_pending, enqueue_mail, start_worker
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from reviews.models import OutboxEmail
+
+
+class TestOutboxMail(TestCase):
+    """Отправка писем через очередь OutboxEmail."""
+
+    def setUp(self):
+        self.email = enqueue_mail('subject', 'body', 'from@example.com',
+                                  'to@example.com')
+
+    def test_pending_mail_is_delivered(self):
+        """Письмо из очереди отправляется и помечается отправленным."""
+        self.assertEqual(deliver_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['to@example.com'])
+        self.email.refresh_from_db()
+        self.assertIsNotNone(self.email.sent_at)
+        self.assertEqual(deliver_pending(), 0)
+
+    def test_failed_mail_is_retried_later(self):
+        """После ошибки письмо откладывается с увеличением счётчика."""
+        with mock.patch('api.mail.EmailMessage.send',
+                        side_effect=SMTPException('down')):
+            self.assertEqual(deliver_pending(), 1)
+        self.email.refresh_from_db()
+        self.assertIsNone(self.email.sent_at)
+        self.assertEqual(self.email.attempts, 1)
+        self.assertEqual(self.email.last_error, 'down')
+        self.assertGreater(self.email.next_attempt_at, timezone.now())
+        self.assertEqual(deliver_pending(), 0)
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_worker_starts_with_server(self):
+        """В режиме 'thread' доставка запускается при старте сервера,
+        а не только после новой регистрации."""
+        with mock.patch('api.mail.worker') as worker:
+            start_worker()
+            worker.wake.assert_called_once_with()
+            worker.reset_mock()
+            with override_settings(EMAIL_OUTBOX={'MODE': 'worker'}):
+                start_worker()
+            worker.wake.assert_not_called()
+
+    def test_worker_restarts_after_fork(self):
+        """Процесс, унаследовавший поток от родителя, запускает свой."""
+        worker = OutboxWorker()
+        with mock.patch('api.mail.threading.Thread') as thread:
+            worker.wake()
+            worker.wake()
+            self.assertEqual(thread.return_value.start.call_count, 1)
+            with mock.patch('api.mail.os.getpid', return_value=-1):
+                worker.wake()
+            self.assertEqual(thread.return_value.start.call_count, 2)
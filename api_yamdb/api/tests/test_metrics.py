@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+import threading
+
+from api.metrics import MetricsRegistry, registry
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+
+class TestMetrics(APITestCase):
+    """Метрики Prometheus на /metrics/."""
+
+    def setUp(self):
+        registry.clear()
+        self.client = APIClient()
+
+    def test_route_metrics(self):
+        """Запросы учитываются по именам маршрутов."""
+        self.client.get(reverse('api:title-list'))
+        self.client.get(reverse('api:title-detail', kwargs={'pk': 0}))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('api_requests_total{route="title-list",method="GET",'
+                      'status="200"} 1', body)
+        self.assertIn('api_requests_total{route="title-detail",'
+                      'method="GET",status="404"} 1', body)
+        self.assertIn('api_request_duration_seconds_bucket'
+                      '{route="title-list",le="+Inf"} 1', body)
+        self.assertIn('api_db_queries_count{route="title-list"} 1', body)
+
+    def test_multiprocess_snapshots(self):
+        """В многопроцессном режиме суммируются снимки всех процессов."""
+        with tempfile.TemporaryDirectory() as directory:
+            other = [['api_requests_total',
+                      [['route', 'title-list'], ['method', 'GET'],
+                       ['status', 200]], 5]]
+            with open(os.path.join(directory, 'metrics_1.json'), 'w') as f:
+                json.dump(other, f)
+            with override_settings(API_METRICS={
+                    'ENABLED': True, 'MULTIPROCESS_DIR': directory}):
+                client = APIClient()
+                client.get(reverse('api:title-list'))
+                response = client.get(reverse('metrics'))
+        self.assertIn('api_requests_total{route="title-list",method="GET",'
+                      'status="200"} 6', response.content.decode())
+
+    def test_finished_thread_values_are_retired(self):
+        """Значения завершившихся потоков сохраняются, а их словари не
+        накапливаются."""
+        metrics = MetricsRegistry()
+        key = ('api_requests_total', ())
+        for _ in range(20):
+            thread = threading.Thread(target=metrics.inc, args=key)
+            thread.start()
+            thread.join()
+        metrics.observe('api_db_queries', (), 1)
+        self.assertEqual(metrics.snapshot()[key], 20)
+        self.assertEqual(len(metrics._shards), 1)
@@ -0,0 +1,97 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from reviews.models import Category, Review, Title, User
+
+TITLES_COUNT = 7
+
+
+class TestPaginationCounts(APITestCase):
+    """Количество объектов в ответах со страницами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='pagination_admin', email='pagination@example.com')
+        category = Category.objects.create(name='c', slug='pagination_c')
+        Title.objects.bulk_create(
+            Title(name=f'title_{i}', year=2000, category=category)
+            for i in range(TITLES_COUNT))
+        cls.title = Title.objects.first()
+        Review.objects.create(title=cls.title, author=cls.admin,
+                              text='review', score=5)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_count_can_be_omitted(self):
+        """С count=false поля count нет, next определяется по limit + 1."""
+        url = reverse('api:title-list')
+        response = self.client.get(url, {'count': 'false', 'limit': 5})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(
+            url, {'count': 'false', 'limit': 5, 'offset': 5})
+        self.assertEqual(len(response.data['results']), TITLES_COUNT - 5)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['previous'])
+
+        response = self.client.get(url, {'limit': 5})
+        self.assertEqual(response.data['count'], TITLES_COUNT)
+
+    def test_page_number_probing(self):
+        """Постраничная пагинация без count."""
+        url = reverse('api:user-list')
+        User.objects.bulk_create(
+            User(username=f'page_user_{i}', email=f'page_{i}@example.com')
+            for i in range(5))
+        response = self.client.get(url, {'count': '0'})
+        self.assertNotIn('count', response.data)
+        self.assertIsNotNone(response.data['next'])
+        response = self.client.get(url, {'count': '0', 'page': 2})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+        response = self.client.get(url, {'count': '0', 'page': 3})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_count_is_cached_until_change(self):
+        """Количество берётся из кэша и сбрасывается при изменениях."""
+        url = reverse('api:user-list')
+        self.assertEqual(self.client.get(url).data['count'], 1)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.assertFalse(any('COUNT(*)' in query['sql']
+                             for query in context.captured_queries))
+
+        User.objects.create_user(username='new_user',
+                                 email='new_user@example.com')
+        self.assertEqual(self.client.get(url).data['count'], 2)
+
+    @override_settings(RESPONSE_CACHE={'ENABLED': False})
+    def test_lists_without_count_skip_count_query(self):
+        """Запросы без count и повторные запросы не выполняют COUNT."""
+        titles = reverse('api:title-list')
+        reviews = reverse('api:reviews-list',
+                          kwargs={'title_id': self.title.id})
+        self.client.get(titles, {'limit': 5})
+        requests = (
+            (titles, {'limit': 5, 'count': 'false'}),
+            (titles, {'limit': 5, 'offset': 5}),
+            (reviews, {'count': 'false'}),
+            (reviews, {'pagination': 'cursor'}),
+        )
+        for url, params in requests:
+            with self.subTest(url=url, params=params):
+                with CaptureQueriesContext(connection) as context:
+                    response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertFalse(any('COUNT(' in query['sql']
+                                     for query in context.captured_queries))
@@ -0,0 +1,80 @@
+import json
+from unittest import mock
+
+from api.profiling import RequestProfile
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+from reviews.models import Category, Genre, Title
+
+PROFILING = {
+    'ENABLED': True,
+    'MAX_QUERIES': 50,
+    'SLOW_REQUEST_MS': 10000,
+    'SLOW_QUERY_MS': 10000,
+}
+
+
+@override_settings(REQUEST_PROFILING=PROFILING,
+                   RESPONSE_CACHE={'ENABLED': False})
+class TestRequestProfiling(APITestCase):
+    """Профилирование запросов (RequestProfilingMiddleware)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='category', slug='category')
+        genre = Genre.objects.create(name='genre', slug='genre')
+        title = Title.objects.create(name='title', year=2000,
+                                     category=category)
+        title.genre.set([genre])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_server_timing_header(self):
+        """Ответ содержит метрики в заголовке Server-Timing."""
+        with self.assertLogs('api.profiling', 'INFO') as logs:
+            response = self.client.get(reverse('api:title-list'))
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'serializer;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], reverse('api:title-list'))
+        self.assertGreater(record['queries'], 0)
+        self.assertIn(f'desc="{record["queries"]} queries"', timing)
+        self.assertNotIn('offending_sql', record)
+
+    def test_serializer_time_is_measured(self):
+        """Время сериализации учитывается и для списков на values()."""
+        profiles = []
+
+        class RecordedProfile(RequestProfile):
+            def __init__(self):
+                super().__init__()
+                profiles.append(self)
+
+        for values_lists in (True, False):
+            with self.subTest(values_lists=values_lists), override_settings(
+                    API_VALUES_LISTS=values_lists), mock.patch(
+                    'api.middleware.RequestProfile', RecordedProfile):
+                with self.assertLogs('api.profiling', 'INFO'):
+                    self.client.get(reverse('api:title-list'))
+                self.assertGreater(profiles[-1].serializer_time, 0)
+
+    def test_query_threshold_logs_sql(self):
+        """Превышение порога логируется вместе с SQL-запросами."""
+        with override_settings(REQUEST_PROFILING={**PROFILING,
+                                                  'MAX_QUERIES': 0}):
+            client = APIClient()
+            with self.assertLogs('api.profiling', 'WARNING') as logs:
+                client.get(reverse('api:title-list'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(len(record['offending_sql']), record['queries'])
+        self.assertIn('reviews_title', record['offending_sql'][0]['sql'])
+
+    @override_settings(REQUEST_PROFILING={'ENABLED': False})
+    def test_disabled(self):
+        """Без включённого профилирования заголовок не добавляется."""
+        response = APIClient().get(reverse('api:title-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -0,0 +1,180 @@
+from api.urls import urlpatterns
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from rest_framework.test import APIClient, APITestCase
+from reviews.cache import get_catalog
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+OBJECTS_COUNT = 5
+
+# Максимальное число SQL-запросов для каждого маршрута api/urls.py.
+# Значения не должны зависеть от количества объектов на странице.
+# Жанры и категории читаются из прогретого кэша справочников.
+QUERY_BUDGETS = {
+    'api-root': 0,
+    'signup': 11,
+    'token': 2,
+    'userme': 1,
+    'user-list': 2,
+    'user-detail': 1,
+    'category-list': 0,
+    'genre-list': 0,
+    'title-list': 3,
+    'title-detail': 2,
+    'title-facets': 2,
+    'reviews-list': 3,
+    'reviews-detail': 2,
+    'comments-list': 3,
+    'comments-detail': 2,
+    'category-detail': 4,
+    'genre-detail': 3,
+}
+
+
+def get_route_names(patterns):
+    """Возвращает имена всех именованных маршрутов."""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= get_route_names(pattern.url_patterns)
+        elif pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class QueryBudgetMixin:
+    """Проверка количества SQL-запросов на обработку запроса к API."""
+
+    def assertQueryBudget(self, route_name, send_request):
+        budget = QUERY_BUDGETS[route_name]
+        with CaptureQueriesContext(connection) as context:
+            response = send_request()
+        self.assertLess(response.status_code, 400, route_name)
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        self.assertLessEqual(
+            len(context), budget,
+            f'Маршрут {route_name} превысил лимит запросов '
+            f'({len(context)} > {budget}):\n{queries}')
+
+
+class TestQueryBudget(QueryBudgetMixin, APITestCase):
+    """Количество запросов к БД не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin',
+            password='password',
+            email='admin@example.com',
+        )
+        authors = [
+            User.objects.create_user(
+                username=f'user_{i}',
+                password='password',
+                email=f'user_{i}@example.com',
+                confirmation_code='code',
+            )
+            for i in range(OBJECTS_COUNT)
+        ]
+        categories = [
+            Category.objects.create(name=f'category_{i}', slug=f'cat_{i}')
+            for i in range(OBJECTS_COUNT)
+        ]
+        genres = [
+            Genre.objects.create(name=f'genre_{i}', slug=f'genre_{i}')
+            for i in range(OBJECTS_COUNT)
+        ]
+        for i, category in enumerate(categories):
+            title = Title.objects.create(
+                name=f'title_{i}', year=2000, category=category)
+            title.genre.set(genres[:2])
+        cls.title = title
+        for author in authors:
+            review = Review.objects.create(
+                title=cls.title, author=author, text='review', score=5)
+            for commentator in authors:
+                Comment.objects.create(
+                    review=review, author=commentator, text='comment')
+        cls.review = review
+        cls.comment = review.comments.first()
+        cls.user = authors[0]
+        cls.category = categories[0]
+        cls.genre = genres[-1]
+
+    def setUp(self):
+        cache.clear()
+        get_catalog(Genre)
+        get_catalog(Category)
+        self.anon_client = APIClient()
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin)
+        self.user_client = APIClient()
+        self.user_client.force_authenticate(self.user)
+
+    def get_requests(self):
+        """Запрос к каждому маршруту, для которого задан лимит."""
+        title = {'title_id': self.title.id}
+        review = {'title_id': self.title.id, 'review_id': self.review.id}
+        anon, admin = self.anon_client, self.admin_client
+        return {
+            'api-root': lambda: anon.get(reverse('api:api-root')),
+            'signup': lambda: anon.post(
+                reverse('api:signup'),
+                {'username': 'new_user', 'email': 'new_user@example.com'}),
+            'token': lambda: anon.post(
+                reverse('api:token'),
+                {'username': self.user.username,
+                 'confirmation_code': self.user.confirmation_code}),
+            'userme': lambda: self.user_client.get(reverse('api:userme')),
+            'user-list': lambda: admin.get(reverse('api:user-list')),
+            'user-detail': lambda: admin.get(
+                reverse('api:user-detail',
+                        kwargs={'username': self.user.username})),
+            'category-list': lambda: anon.get(reverse('api:category-list')),
+            'category-detail': lambda: admin.delete(
+                reverse('api:category-detail',
+                        kwargs={'slug': self.category.slug})),
+            'genre-list': lambda: anon.get(reverse('api:genre-list')),
+            'genre-detail': lambda: admin.delete(
+                reverse('api:genre-detail', kwargs={'slug': self.genre.slug})),
+            'title-list': lambda: anon.get(reverse('api:title-list')),
+            'title-detail': lambda: anon.get(
+                reverse('api:title-detail', kwargs={'pk': self.title.id})),
+            'title-facets': lambda: anon.get(
+                reverse('api:title-facets'), {'genre': self.genre.slug}),
+            'reviews-list': lambda: anon.get(
+                reverse('api:reviews-list', kwargs=title)),
+            'reviews-detail': lambda: anon.get(
+                reverse('api:reviews-detail',
+                        kwargs={**title, 'pk': self.review.id})),
+            'comments-list': lambda: anon.get(
+                reverse('api:comments-list', kwargs=review)),
+            'comments-detail': lambda: anon.get(
+                reverse('api:comments-detail',
+                        kwargs={**review, 'pk': self.comment.id})),
+        }
+
+    def test_every_route_has_budget(self):
+        """Для каждого маршрута api/urls.py задан лимит запросов."""
+        missing = get_route_names(urlpatterns) - set(QUERY_BUDGETS)
+        self.assertFalse(missing, f'Не задан лимит запросов: {missing}')
+
+    def test_routes_fit_query_budget(self):
+        """Маршруты укладываются в заданное количество запросов."""
+        requests = self.get_requests()
+        for route_name in QUERY_BUDGETS:
+            with self.subTest(route=route_name):
+                self.assertQueryBudget(route_name, requests[route_name])
+
+    def test_title_list_queries_do_not_depend_on_page_size(self):
+        """Количество запросов к списку произведений не растёт с limit."""
+        url = reverse('api:title-list')
+        # Количество объектов берётся из кэша и во втором запросе.
+        self.anon_client.get(url, {'limit': 2})
+        with CaptureQueriesContext(connection) as one:
+            self.anon_client.get(url, {'limit': 1})
+        with CaptureQueriesContext(connection) as many:
+            self.anon_client.get(url, {'limit': OBJECTS_COUNT})
+        self.assertEqual(len(one), len(many))
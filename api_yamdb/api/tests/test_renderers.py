@@ -0,0 +1,63 @@
+import datetime as dt
+import io
+from collections import OrderedDict
+from decimal import Decimal
+from unittest import mock
+
+from api.parsers import ORJSONParser
+from api.renderers import ORJSONRenderer
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from reviews.models import Title
+
+
+class TestORJSON(APITestCase):
+    """Отрисовка и разбор JSON с помощью orjson."""
+
+    data = {
+        'count': 2,
+        'results': [
+            OrderedDict(id=1, name='Побег\u2028из\u2029Шоушенка', rating=None,
+                        genre=[{'name': 'Драма', 'slug': 'drama'}]),
+            {'id': 2, 'pub_date': '2023-05-01T10:00:00.123456Z',
+             'text': gettext_lazy('Not found.'), 'price': Decimal('1.50'),
+             1: True},
+        ],
+    }
+
+    def test_render_matches_json_renderer(self):
+        expected = JSONRenderer().render(self.data)
+        self.assertEqual(ORJSONRenderer().render(self.data), expected)
+        with mock.patch('api.renderers.orjson', None):
+            self.assertEqual(ORJSONRenderer().render(self.data), expected)
+
+    def test_render_datetime(self):
+        value = dt.datetime(2023, 5, 1, 10, 0, 0, 123456,
+                            tzinfo=dt.timezone.utc)
+        self.assertEqual(ORJSONRenderer().render({'pub_date': value}),
+                         b'{"pub_date":"2023-05-01T10:00:00.123456Z"}')
+
+    def test_indent_uses_json_renderer(self):
+        context = {'indent': 4}
+        self.assertEqual(
+            ORJSONRenderer().render(self.data, renderer_context=context),
+            JSONRenderer().render(self.data, renderer_context=context))
+
+    def test_parse(self):
+        body = '{"name": "Побег", "year": 1994, "genre": ["drama"]}'
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(body.encode())),
+            {'name': 'Побег', 'year': 1994, 'genre': ['drama']})
+        for invalid in (b'{"name": ', b'{"rating": NaN}'):
+            with self.subTest(body=invalid):
+                with self.assertRaises(ParseError):
+                    ORJSONParser().parse(io.BytesIO(invalid))
+
+    def test_api_uses_orjson(self):
+        Title.objects.create(name='Побег', year=1994)
+        response = self.client.get(reverse('api:title-list'))
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+        self.assertEqual(response.json()['results'][0]['name'], 'Побег')
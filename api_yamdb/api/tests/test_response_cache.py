@@ -0,0 +1,168 @@
+import threading
+import time
+from unittest import mock
+
+from api.authentication import CachedJWTAuthentication, get_token
+from api.views import TitleViewSet
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APITestCase
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+class TestResponseCache(APITestCase):
+    """Кэш готовых ответов для чтения без прав на запись."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            username='cache_admin', email='cache_admin@example.com',
+            role=User.ADMIN)
+        cls.user = User.objects.create_user(
+            username='cache_user', email='cache_user@example.com')
+        cls.category = Category.objects.create(name='c', slug='cache_c')
+        cls.genre = Genre.objects.create(name='g', slug='cache_g')
+        cls.title = Title.objects.create(name='t', year=2000,
+                                         category=cls.category)
+        cls.title.genre.set([cls.genre])
+
+    def setUp(self):
+        cache.clear()
+        self.anon_client = APIClient()
+        self.user_client = APIClient()
+        self.user_client.force_authenticate(self.user)
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin)
+
+    def test_repeated_request_is_served_from_cache(self):
+        """Повторный запрос отдаётся из кэша без запросов к БД."""
+        url = reverse('api:title-list')
+        first = self.anon_client.get(url)
+        self.assertFalse(first.has_header('X-Cache'))
+        with self.assertNumQueries(0):
+            second = self.anon_client.get(url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        response = self.anon_client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_query_string_is_normalized(self):
+        """Порядок параметров не влияет на ключ, неизвестные отключают кэш."""
+        url = reverse('api:title-list')
+        self.anon_client.get(url, {'year': 2000, 'genre': 'cache_g'})
+        response = self.anon_client.get(f'{url}?genre=cache_g&year=2000')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        self.anon_client.get(url, {'unknown': 1})
+        response = self.anon_client.get(url, {'unknown': 1})
+        self.assertFalse(response.has_header('X-Cache'))
+
+    def test_writers_bypass_cache(self):
+        """Пользователи с правом записи получают ответ мимо кэша."""
+        titles_url = reverse('api:title-list')
+        reviews_url = reverse('api:reviews-list', args=[self.title.pk])
+        self.anon_client.get(titles_url)
+        self.anon_client.get(reviews_url)
+        self.assertEqual(self.user_client.get(titles_url)['X-Cache'], 'HIT')
+        self.assertFalse(
+            self.admin_client.get(titles_url).has_header('X-Cache'))
+        self.assertFalse(
+            self.user_client.get(reviews_url).has_header('X-Cache'))
+
+    def test_browsable_api_pages_are_not_cached(self):
+        """Страницы Browsable API с именем пользователя не кэшируются."""
+        url = reverse('api:title-list')
+        response = self.user_client.get(url, HTTP_ACCEPT='text/html')
+        self.assertIn('cache_user', response.content.decode())
+        response = self.anon_client.get(url, HTTP_ACCEPT='text/html')
+        self.assertFalse(response.has_header('X-Cache'))
+        self.assertNotIn('cache_user', response.content.decode())
+
+    def test_token_is_validated_once(self):
+        """Аутентификация для выбора кэша не повторяется при обработке."""
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {get_token(self.user)}')
+        url = reverse('api:reviews-list', args=[self.title.pk])
+        for expected_cache in (False, True):
+            with mock.patch.object(
+                    CachedJWTAuthentication, 'authenticate', autospec=True,
+                    side_effect=CachedJWTAuthentication.authenticate
+            ) as authenticate:
+                response = client.get(reverse('api:title-list'))
+                self.assertEqual(response.has_header('X-Cache'),
+                                 expected_cache)
+                # Пользователь с правом записи отзывов: кэш не используется.
+                self.assertEqual(client.get(url).status_code, 200)
+            self.assertEqual(authenticate.call_count, 2)
+
+        client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        response = client.get(reverse('api:title-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_comment_signal_uses_loaded_review(self):
+        review = Review.objects.create(title=self.title, author=self.user,
+                                       text='review', score=5)
+        with CaptureQueriesContext(connection) as queries:
+            Comment.objects.create(review=review, author=self.user,
+                                   text='comment')
+        self.assertFalse([
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_review"' in query['sql']
+        ])
+
+    def test_changes_invalidate_affected_responses(self):
+        """Новый отзыв сбрасывает ответы произведения, но не другие."""
+        other = Title.objects.create(name='other', year=2001,
+                                     category=self.category)
+        urls = (reverse('api:title-list'),
+                reverse('api:title-detail', args=[self.title.pk]),
+                reverse('api:reviews-list', args=[self.title.pk]))
+        other_url = reverse('api:title-detail', args=[other.pk])
+        for url in (*urls, other_url):
+            self.anon_client.get(url)
+
+        Review.objects.create(title=self.title, author=self.user,
+                              text='text', score=7)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.anon_client.get(url)
+                self.assertFalse(response.has_header('X-Cache'))
+        self.assertEqual(
+            self.anon_client.get(urls[1]).json()['rating'], 7)
+        self.assertEqual(self.anon_client.get(other_url)['X-Cache'], 'HIT')
+
+        self.genre.name = 'renamed'
+        self.genre.save()
+        response = self.anon_client.get(urls[1])
+        self.assertEqual(response.json()['genre'][0]['name'], 'renamed')
+
+    def test_cold_key_is_computed_once(self):
+        """Одновременные запросы к пустому ключу вычисляют ответ один раз."""
+        calls = []
+
+        def slow_list(view, request, *args, **kwargs):
+            calls.append(1)
+            time.sleep(0.2)
+            return Response({'results': []})
+
+        url = reverse('api:title-list')
+        responses = []
+        threads = [threading.Thread(
+            target=lambda: responses.append(APIClient().get(url)))
+            for _ in range(4)]
+        with mock.patch.object(TitleViewSet, 'list', slow_list):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({response.status_code for response in responses},
+                         {status.HTTP_200_OK})
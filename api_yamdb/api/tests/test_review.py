@@ -1,3 +1,6 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
@@ -172,3 +175,71 @@ class TestMyAPI(APITestCase):
         response = self.user_client.get(url_title)
         new_title_rating = response.json()['rating']
         self.assertEqual(new_title_rating, 5)
+
+    def test_rating_aggregates_follow_review_changes(self):
+        """Агрегаты рейтинга меняются при создании, правке и удалении."""
+        review = Review.objects.create(
+            title=self.title,
+            author=self.moderator,
+            text='review_2',
+            score=4
+        )
+        self.title.refresh_from_db()
+        self.assertEqual((self.title.rating_sum, self.title.rating_count),
+                         (12, 2))
+
+        review.score = 10
+        review.save()
+        self.title.refresh_from_db()
+        self.assertEqual((self.title.rating_sum, self.title.rating_count),
+                         (18, 2))
+
+        review.delete()
+        self.title.refresh_from_db()
+        self.assertEqual((self.title.rating_sum, self.title.rating_count),
+                         (8, 1))
+
+        self.user.delete()
+        self.title.refresh_from_db()
+        self.assertEqual((self.title.rating_sum, self.title.rating_count),
+                         (0, 0))
+        self.assertIsNone(self.title.rating)
+
+    def test_rebuild_ratings_fixes_drift(self):
+        """Команда rebuild_ratings находит и исправляет расхождения."""
+        Title.objects.filter(pk=self.title.pk).update(rating_sum=100)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_ratings', '--check', stdout=StringIO())
+
+        call_command('rebuild_ratings', stdout=StringIO())
+        self.title.refresh_from_db()
+        self.assertEqual((self.title.rating_sum, self.title.rating_count),
+                         (8, 1))
+        call_command('rebuild_ratings', '--check', stdout=StringIO())
+
+    def test_cursor_pagination_mode(self):
+        """Параметр pagination=cursor включает курсорную пагинацию."""
+        for i in range(6):
+            author = User.objects.create_user(
+                username=f'author_{i}',
+                password='password',
+                email=f'author_{i}@example.com'
+            )
+            Review.objects.create(
+                title=self.title, author=author, text='review', score=5)
+        url = reverse('api:reviews-list', kwargs={'title_id': self.title.id})
+
+        response = self.anon_client.get(url)
+        self.assertEqual(response.data['count'], 7)
+
+        response = self.anon_client.get(url, {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        first_page = [review['id'] for review in response.data['results']]
+        self.assertEqual(len(first_page), 5)
+
+        response = self.anon_client.get(response.data['next'])
+        second_page = [review['id'] for review in response.data['results']]
+        self.assertEqual(len(second_page), 2)
+        self.assertIsNone(response.data['next'])
+        self.assertFalse(set(first_page) & set(second_page))
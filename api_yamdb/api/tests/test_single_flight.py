@@ -0,0 +1,126 @@
+import threading
+import time
+from unittest import mock
+
+from api.conditional import ConditionalListMixin
+from api.single_flight import SingleFlight, shared_do
+from api.views import ValuesListMixin
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+SHARED_OPTIONS = {'ALIAS': 'default', 'WAIT': 1, 'RESULT_TIMEOUT': 1,
+                  'LOCK_TIMEOUT': 1, 'POLL_INTERVAL': 0.01}
+
+
+def run_concurrently(func, count=4):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(func()))
+               for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight(SimpleTestCase):
+    """Объединение одновременных вызовов."""
+
+    def test_concurrent_calls_share_result(self):
+        """Одновременные вызовы с одним ключом выполняют func один раз."""
+        group = SingleFlight()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return object()
+
+        results = run_concurrently(lambda: group.do('key', compute, 5))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({id(result) for result, _ in results}), 1)
+        self.assertEqual(sorted(shared for _, shared in results),
+                         [False, True, True, True])
+
+    def test_failed_call_is_retried_by_waiters(self):
+        """После ошибки первого вызова ожидающие вычисляют результат сами."""
+        group = SingleFlight()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            if len(calls) == 1:
+                raise ValueError
+            return 'result'
+
+        def call():
+            try:
+                return group.do('key', compute, 5)[0]
+            except ValueError:
+                return 'error'
+
+        results = run_concurrently(call, count=3)
+        self.assertEqual(sorted(results), ['error', 'result', 'result'])
+
+    def test_shared_result_from_other_process(self):
+        """Результат другого процесса берётся из общего кэша."""
+        cache.clear()
+        cache.add('key:lock', 1)
+        threading.Timer(0.05, cache.set, ('key:result', 'other')).start()
+        self.assertEqual(shared_do('key', lambda: 'own', SHARED_OPTIONS),
+                         'other')
+        self.assertEqual(shared_do('key', lambda: 'own', SHARED_OPTIONS),
+                         'other')
+        cache.clear()
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class TestSingleFlightList(SimpleTestCase):
+    """Одновременные запросы к list вычисляют страницу один раз."""
+
+    def test_identical_list_requests_are_coalesced(self):
+        calls = []
+
+        def slow_list(view, request, *args, **kwargs):
+            calls.append(request.query_params.get('genre'))
+            time.sleep(0.2)
+            return Response({'results': [len(calls)]})
+
+        url = reverse('api:title-list')
+        with mock.patch.object(ValuesListMixin, 'list', slow_list), \
+                mock.patch.object(ConditionalListMixin, 'get_list_validators',
+                                  return_value=('"etag"', None)):
+            responses = run_concurrently(
+                lambda: APIClient().get(url, {'genre': 'drama'}))
+            self.assertEqual(calls, ['drama'])
+            APIClient().get(url, {'genre': 'comedy'})
+        self.assertEqual(calls, ['drama', 'comedy'])
+        self.assertEqual({response.content for response in responses},
+                         {b'{"results":[1]}'})
+
+    @override_settings(RESPONSE_CACHE={'ENABLED': False},
+                       DATABASE_ROUTING={'REPLICAS': ('default',)})
+    def test_pinned_requests_are_not_coalesced(self):
+        """Клиент, закреплённый за основной БД, вычисляет список сам."""
+        calls = []
+
+        def slow_list(view, request, *args, **kwargs):
+            calls.append(1)
+            time.sleep(0.1)
+            return Response({'results': []})
+
+        def pinned_get():
+            client = APIClient()
+            client.cookies['db_primary'] = '1'
+            return client.get(url)
+
+        url = reverse('api:title-list')
+        with mock.patch.object(ValuesListMixin, 'list', slow_list), \
+                mock.patch.object(ConditionalListMixin, 'get_list_validators',
+                                  return_value=('"etag"', None)):
+            run_concurrently(pinned_get)
+        self.assertEqual(len(calls), 4)
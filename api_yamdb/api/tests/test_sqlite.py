@@ -0,0 +1,47 @@
+from unittest import mock
+
+from api.sqlite import _begin_immediate
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+
+
+class TestSQLiteTuning(TestCase):
+    """Настройка соединений SQLite через connection_created."""
+
+    def new_connection(self):
+        new_connection = connection.copy()
+        self.addCleanup(new_connection.close)
+        new_connection.ensure_connection()
+        return new_connection
+
+    @staticmethod
+    def pragma(db, name):
+        with db.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_TUNING={'ENABLED': True, 'BUSY_TIMEOUT': 1234,
+                                      'CACHE_SIZE': -1024})
+    def test_pragmas_are_applied(self):
+        """PRAGMA из SQLITE_TUNING применяются к новому соединению."""
+        db = self.new_connection()
+        self.assertEqual(self.pragma(db, 'busy_timeout'), 1234)
+        self.assertEqual(self.pragma(db, 'cache_size'), -1024)
+        self.assertEqual(self.pragma(db, 'synchronous'), 1)
+        self.assertEqual(db._start_transaction_under_autocommit.__func__,
+                         _begin_immediate)
+
+    @override_settings(SQLITE_TUNING={'ENABLED': False, 'BUSY_TIMEOUT': 1})
+    def test_disabled_tuning_keeps_connection(self):
+        """Без ENABLED соединение не меняется."""
+        db = self.new_connection()
+        self.assertNotEqual(self.pragma(db, 'busy_timeout'), 1)
+        self.assertNotIn('_start_transaction_under_autocommit', vars(db))
+
+    @override_settings(SQLITE_TUNING={'ENABLED': True})
+    def test_immediate_transactions_require_django_3_2(self):
+        """Замена внутреннего метода не применяется к другим версиям."""
+        with mock.patch('api.sqlite.django.VERSION', (5, 1, 0, 'final', 0)):
+            with self.assertRaises(ImproperlyConfigured):
+                self.new_connection()
@@ -1,6 +1,8 @@
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient, APITestCase
-from reviews.models import Category, Genre, Title, User
+from reviews.models import Category, Genre, GenreTitle, Review, Title, User
+from reviews.signals import data_changed
 
 
 class TestMyAPI(APITestCase):
@@ -153,3 +155,126 @@ class TestMyAPI(APITestCase):
 
         response = self.superuser_client.patch(url, patch_request_2)
         self.assertEqual(response.status_code, 200)
+
+    def test_titles_full_text_search(self):
+        """Поиск search находит произведения по началу слов."""
+
+        Title.objects.create(
+            name='Побег из Шоушенка', year=1994, category=self.category,
+            description='Тюремная драма')
+        Title.objects.create(
+            name='Зелёная миля', year=1999, category=self.category,
+            description='Побег не удался')
+
+        url = reverse('api:title-list')
+        response = self.anon_client.get(url, {'search': 'побе'})
+        names = [title['name'] for title in response.json()['results']]
+        self.assertEqual(names, ['Побег из Шоушенка', 'Зелёная миля'])
+
+        response = self.anon_client.get(url, {'search': 'тюремная побег'})
+        names = [title['name'] for title in response.json()['results']]
+        self.assertEqual(names, ['Побег из Шоушенка'])
+
+        title = Title.objects.get(name='Зелёная миля')
+        title.description = ''
+        title.save()
+        response = self.anon_client.get(url, {'search': 'побег'})
+        self.assertEqual(response.json()['count'], 1)
+
+    @override_settings(RESPONSE_CACHE={'ENABLED': False})
+    def test_conditional_get(self):
+        """Повторный запрос с If-None-Match получает ответ 304, пока
+        произведение, его отзывы и справочники не изменились."""
+        urls = (reverse('api:title-list'),
+                reverse('api:title-detail', kwargs={'pk': self.title.id}))
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.anon_client.get(url)['ETag']
+                response = self.anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+                Review.objects.create(title=self.title, author=self.user,
+                                      text='review', score=5)
+                response = self.anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                etag = response['ETag']
+
+                self.genre.name = 'renamed_genre'
+                self.genre.save()
+                response = self.anon_client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                Review.objects.all().delete()
+
+        etag = self.anon_client.get(urls[0])['ETag']
+        with self.assertNumQueries(0):
+            response = self.anon_client.get(urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(RESPONSE_CACHE={'ENABLED': False})
+    def test_conditional_get_follows_genre_links(self):
+        """ETag меняется при изменении жанров произведения и после
+        массовой загрузки данных, хотя updated_at остаётся прежним."""
+        urls = (reverse('api:title-list'),
+                reverse('api:title-detail', kwargs={'pk': self.title.id}))
+        genre = Genre.objects.create(name='other_genre', slug='other_genre')
+        changes = (
+            lambda: self.title.genre.add(genre),
+            lambda: GenreTitle.objects.filter(genre=genre).delete(),
+            lambda: GenreTitle.objects.create(title=self.title, genre=genre),
+            lambda: data_changed.send(sender=GenreTitle),
+        )
+        for url in urls:
+            for change in changes:
+                with self.subTest(url=url):
+                    etag = self.anon_client.get(url)['ETag']
+                    change()
+                    response = self.anon_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 200)
+            GenreTitle.objects.filter(genre=genre).delete()
+
+    def test_titles_rating_filters_and_ordering(self):
+        """Фильтры rating_min/rating_max и сортировка по рейтингу."""
+        best = Title.objects.create(name='best', year=1994,
+                                    category=self.category)
+        good = Title.objects.create(name='good', year=1999,
+                                    category=self.category)
+        unrated = Title.objects.create(name='unrated', year=2001,
+                                       category=self.category)
+        for title, author, score in ((best, self.user, 9),
+                                     (best, self.moderator, 8),
+                                     (good, self.user, 6)):
+            Review.objects.create(title=title, author=author, text='review',
+                                  score=score)
+        best.refresh_from_db()
+        self.assertEqual(best.rating, 8.5)
+
+        url = reverse('api:title-list')
+        cases = (
+            ({'rating_min': 8}, ['best']),
+            ({'rating_max': 8}, ['best', 'good']),
+            ({'rating_min': 7, 'rating_max': 7}, []),
+            ({'category': self.category.slug, 'rating_min': 6},
+             ['best', 'good']),
+            ({'ordering': '-rating'},
+             ['best', 'good', unrated.name, self.title.name]),
+            ({'ordering': 'rating,-year'},
+             [self.title.name, unrated.name, 'good', 'best']),
+            ({'genre': self.genre.slug, 'ordering': '-rating'},
+             [self.title.name]),
+        )
+        for params, names in cases:
+            with self.subTest(params=params):
+                response = self.anon_client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [title['name'] for title in response.json()['results']],
+                    names)
+        self.assertEqual(
+            self.anon_client.get(url, {'ordering': '-rating'}).json()[
+                'results'][0]['rating'], 8)
+
+        for params in ({'ordering': 'description'}, {'rating_min': 'high'}):
+            with self.subTest(params=params):
+                response = self.anon_client.get(url, params)
+                self.assertEqual(response.status_code, 400)
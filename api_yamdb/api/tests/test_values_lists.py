@@ -0,0 +1,73 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+@override_settings(RESPONSE_CACHE={'ENABLED': False})
+class TestValuesLists(APITestCase):
+    """Списки на values() совпадают с ответами сериализаторов побайтно.
+
+    Кэш ответов отключён: его ключ не зависит от API_VALUES_LISTS.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            User.objects.create_user(username=f'user_{i}',
+                                     email=f'user_{i}@example.com')
+            for i in range(3)
+        ]
+        genres = [Genre.objects.create(name=name, slug=name)
+                  for name in ('drama', 'comedy', 'action')]
+        category = Category.objects.create(name='Фильм', slug='movie')
+        titles = [
+            Title.objects.create(name='Побег', year=1994, category=category,
+                                 description='Тюремная драма'),
+            Title.objects.create(name='Без категории', year=2000),
+            Title.objects.create(name='Побег 2', year=2001,
+                                 category=category),
+        ]
+        titles[0].genre.set(genres)
+        titles[2].genre.set(genres[1:])
+        for score, user in enumerate(users, start=7):
+            review = Review.objects.create(title=titles[0], author=user,
+                                           text='отзыв', score=score)
+            for commentator in users:
+                Comment.objects.create(review=review, author=commentator,
+                                       text='комментарий')
+        cls.title = titles[0]
+        cls.review = review
+
+    def setUp(self):
+        cache.clear()
+
+    def assertSameContent(self, url, params=None):
+        with override_settings(API_VALUES_LISTS=False):
+            expected = self.client.get(url, params)
+        with override_settings(API_VALUES_LISTS=True):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(response.content, expected.content)
+
+    def test_lists_match_serializers(self):
+        reviews_url = reverse('api:reviews-list',
+                              kwargs={'title_id': self.title.id})
+        comments_url = reverse('api:comments-list',
+                               kwargs={'title_id': self.title.id,
+                                       'review_id': self.review.id})
+        cases = (
+            (reverse('api:title-list'), None),
+            (reverse('api:title-list'), {'limit': 2, 'offset': 1}),
+            (reverse('api:title-list'), {'search': 'побег'}),
+            (reverse('api:title-list'), {'genre': 'comedy'}),
+            (reviews_url, None),
+            (reviews_url, {'pagination': 'cursor', 'page_size': 2}),
+            (comments_url, None),
+            (comments_url, {'pagination': 'cursor'}),
+        )
+        for url, params in cases:
+            with self.subTest(url=url, params=params):
+                self.assertSameContent(url, params)
@@ -2,26 +2,36 @@
 
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, status, viewsets
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import AccessToken
-from reviews.models import Category, Genre, Title, User
+from reviews.cache import get_catalog, get_version
+from reviews.models import Category, Genre, GenreTitle, Review, Title, User
 
+from .authentication import get_token
+from .conditional import ConditionalGetMixin, ConditionalListMixin
+from .db_routing import ReplicaReadMixin
+from .facets import FACETS_PARAM, title_facets
 from .filters import TitleFilter
+from .mail import enqueue_mail
+from .pagination import CountedLimitOffsetPagination, PageOrCursorPagination
 from .permissions import (AdminOrReadOnly, IsAuthorOrStaffOrReadOnly,
                           UserPermissions)
+from .profiling import current_profile
+from .response_cache import ResponseCacheMixin
 from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, ReviewSerializer, SignUpSerializer,
-                          TitleReadSerializer, TitleWriteSerializer,
+                          CommentValuesSerializer, GenreSerializer,
+                          ReviewSerializer, ReviewValuesSerializer,
+                          SignUpSerializer, TitleReadSerializer,
+                          TitleValuesSerializer, TitleWriteSerializer,
                           TokenSerializer, UserMeSerializer, UserSerializer)
+from .single_flight import SingleFlightListMixin
 
 
 @api_view(['POST'])
@@ -31,17 +41,17 @@ def signup(request):
     serializer.is_valid(raise_exception=True)
     email = serializer.validated_data['email']
     username = serializer.validated_data['username']
-    user, _ = User.objects.get_or_create(email=email, username=username)
-    confirmation_code = default_token_generator.make_token(user)
-    user.confirmation_code = confirmation_code
-    user.save()
-    send_mail(
-        'Confirmation code',
-        f'Your confirmation code is: {confirmation_code}',
-        settings.EMAIL_HOST_USER,
-        [email],
-        fail_silently=False,
-    )
+    with transaction.atomic():
+        user, _ = User.objects.get_or_create(email=email, username=username)
+        confirmation_code = default_token_generator.make_token(user)
+        user.confirmation_code = confirmation_code
+        user.save()
+        enqueue_mail(
+            'Confirmation code',
+            f'Your confirmation code is: {confirmation_code}',
+            settings.EMAIL_HOST_USER,
+            email,
+        )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -52,11 +62,11 @@ def token(request):
     serializer.is_valid(raise_exception=True)
     username = serializer.validated_data.get('username')
     user = get_object_or_404(User, username=username)
-    token = AccessToken.for_user(user)
+    token = get_token(user)
     return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = (UserPermissions,)
@@ -66,100 +76,242 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
 class UserMeAPI(APIView):
+    """Профиль текущего пользователя.
+
+    В request.user загружены только поля для проверки прав (см.
+    authentication.py), поэтому профиль читается из БД целиком.
+    """
+
     permission_classes = (IsAuthenticated,)
 
+    def get_user(self):
+        return User.objects.get(pk=self.request.user.pk)
+
     def get(self, request):
-        serializer = UserMeSerializer(request.user)
+        serializer = UserMeSerializer(self.get_user())
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def patch(self, request):
-        serializer = UserMeSerializer(request.user, data=request.data,
+        serializer = UserMeSerializer(self.get_user(), data=request.data,
                                       partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CreateListDestroyViewSet(mixins.CreateModelMixin,
+class CreateListDestroyViewSet(ReplicaReadMixin,
+                               mixins.CreateModelMixin,
                                mixins.ListModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
     pass
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all()
-    pagination_class = LimitOffsetPagination
+class ValuesListMixin:
+    """Список на строках values() вместо экземпляров моделей.
+
+    Включается настройкой API_VALUES_LISTS. Ответ совпадает с ответом
+    обычного сериализатора (см. ValuesSerializer).
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'API_VALUES_LISTS', False):
+            return super().list(request, *args, **kwargs)
+        serializer = self.values_serializer_class()
+        rows = serializer.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(self.represent_values(serializer, list(rows)))
+        return self.get_paginated_response(
+            self.represent_values(serializer, list(page)))
+
+    @staticmethod
+    def represent_values(serializer, rows):
+        """to_representation с учётом времени в профиле запроса
+        (ValuesSerializer не наследует BaseSerializer)."""
+        profile = current_profile.get()
+        if profile is None:
+            return serializer.to_representation(rows)
+        return profile.serialize(lambda: serializer.to_representation(rows))
+
+
+class TitleViewSet(ResponseCacheMixin, ReplicaReadMixin, ConditionalGetMixin,
+                   SingleFlightListMixin, ValuesListMixin,
+                   viewsets.ModelViewSet):
+    """Обработчик запросов к произведениям.
+
+    Чтение выполняется фиксированным числом запросов независимо от размера
+    страницы: количество (если его нет в кэше, см. pagination.py),
+    страница и связи с жанрами всей страницы одним запросом (итого 3,
+    при ответе 304 запросов нет); объект - 2 запроса. Сами жанры
+    и категории берутся из кэша справочников.
+    """
+
+    queryset = Title.objects.prefetch_related(
+        Prefetch('genretitle_set', queryset=GenreTitle.objects.order_by()))
+    pagination_class = CountedLimitOffsetPagination
     permission_classes = (AdminOrReadOnly, )
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    etag_catalogs = (Genre, Category)
+    values_serializer_class = TitleValuesSerializer
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleReadSerializer
         return TitleWriteSerializer
 
-    def get_queryset(self):
-        queryset = Title.objects.all()
-        if self.get_serializer_class() == TitleReadSerializer:
-            queryset = queryset.annotate(rating=Avg('reviews__score'))
-        return queryset
+    def etag_scopes(self):
+        if 'pk' in self.kwargs:
+            return (f'title:{self.kwargs["pk"]}', 'catalog')
+        return ('titles', 'catalog')
+
+    response_cache_scopes = etag_scopes
+
+    def bypass_response_cache(self, user):
+        return user.is_authenticated and user.is_admin
+
+    def get_cache_query_params(self):
+        return super().get_cache_query_params() | {FACETS_PARAM}
+
+    @action(detail=False)
+    def facets(self, request):
+        """Количество произведений по жанрам, категориям и годам."""
+        return Response(title_facets(request))
+
 
+class CatalogListMixin(ConditionalListMixin):
+    """Список справочника из кэша, если в запросе нет поиска.
 
-class GenreViewSet(CreateListDestroyViewSet):
+    ETag такого списка строится по версии справочника без запросов к БД.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(filters.SearchFilter.search_param):
+            return super().list(request, *args, **kwargs)
+        return self.conditional_response(
+            self.make_validators(None, get_version(self.queryset.model)),
+            self.catalog_list)
+
+    def catalog_list(self):
+        rows = list(get_catalog(self.queryset.model).rows)
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(self.get_serializer(rows, many=True).data)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class GenreViewSet(CatalogListMixin, CreateListDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (AdminOrReadOnly, )
     filter_backends = (filters.SearchFilter, )
     lookup_field = 'slug'
-    pagination_class = LimitOffsetPagination
+    pagination_class = CountedLimitOffsetPagination
     search_fields = ('name',)
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class CategoryViewSet(CatalogListMixin, CreateListDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (AdminOrReadOnly, )
     filter_backends = (filters.SearchFilter, )
     lookup_field = 'slug'
-    pagination_class = LimitOffsetPagination
+    pagination_class = CountedLimitOffsetPagination
     search_fields = ('name',)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    """Обработчик запросов к отзывам на произведения."""
+class NestedParentMixin:
+    """Родительские объекты вложенных маршрутов.
+
+    parent_lookups - цепочка (имя, модель, параметр URL) от внешнего
+    родителя к ближайшему. Вся цепочка проверяется одним запросом к модели
+    ближайшего родителя (остальные загружаются через JOIN), результат
+    сохраняется в представлении до конца запроса. Если родитель не найден
+    или не принадлежит предыдущему в цепочке, возвращается 404.
+    """
+
+    parent_lookups = ()
+
+    def get_parents(self):
+        if not hasattr(self, '_parents'):
+            self._parents = self.resolve_parents()
+        return self._parents
+
+    def get_parent(self, name):
+        return self.get_parents()[name]
+
+    def resolve_parents(self):
+        *ancestors, (name, model, kwarg) = self.parent_lookups
+        filters = {'pk': self.kwargs.get(kwarg)}
+        path = []
+        for ancestor_name, _, ancestor_kwarg in reversed(ancestors):
+            path.append(ancestor_name)
+            filters['__'.join((*path, 'pk'))] = self.kwargs.get(
+                ancestor_kwarg)
+        queryset = model.objects.all()
+        if path:
+            queryset = queryset.select_related('__'.join(path))
+        obj = get_object_or_404(queryset, **filters)
+        parents = {name: obj}
+        for ancestor_name in path:
+            obj = getattr(obj, ancestor_name)
+            parents[ancestor_name] = obj
+        return parents
+
+
+class ReviewViewSet(ResponseCacheMixin, ReplicaReadMixin, ConditionalGetMixin,
+                    SingleFlightListMixin, ValuesListMixin, NestedParentMixin,
+                    viewsets.ModelViewSet):
+    """Обработчик запросов к отзывам на произведения.
+
+    Авторы отзывов загружаются вместе со страницей (JOIN).
+    """
 
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
+    pagination_class = PageOrCursorPagination
     permission_classes = (IsAuthorOrStaffOrReadOnly,)
+    parent_lookups = (('title', Title, 'title_id'),)
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        serializer.validated_data['title'] = title
+        serializer.validated_data['title'] = self.get_parent('title')
         serializer.save(author=self.request.user)
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        return title.reviews.all()
+        return self.get_parent('title').reviews.select_related('author')
 
+    def etag_scopes(self):
+        return (f'reviews:{self.kwargs["title_id"]}', 'authors')
 
-class CommentViewSet(viewsets.ModelViewSet):
-    """Обработчик запросов к комментариям на отзывы."""
+    response_cache_scopes = etag_scopes
+
+
+class CommentViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                     SingleFlightListMixin, ValuesListMixin, NestedParentMixin,
+                     viewsets.ModelViewSet):
+    """Обработчик запросов к комментариям на отзывы.
+
+    Отзыв и произведение проверяются одним запросом, авторы комментариев
+    загружаются вместе со страницей (JOIN).
+    """
 
     serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
+    pagination_class = PageOrCursorPagination
     permission_classes = (IsAuthorOrStaffOrReadOnly,)
+    parent_lookups = (('title', Title, 'title_id'),
+                      ('review', Review, 'review_id'))
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        review_id = self.kwargs.get('review_id')
-        review = title.reviews.get(id=review_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user,
+                        review=self.get_parent('review'))
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        review_id = self.kwargs.get('review_id')
-        review = title.reviews.get(id=review_id)
-        return review.comments.all()
+        return self.get_parent('review').comments.select_related('author')
+
+    def etag_scopes(self):
+        return (f'comments:{self.kwargs["review_id"]}', 'authors')
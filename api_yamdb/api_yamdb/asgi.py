@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
 application = get_asgi_application()
+
+from api.mail import start_worker  # noqa: E402
+
+# Доставка писем, ожидающих в очереди с прошлого запуска.
+start_worker()
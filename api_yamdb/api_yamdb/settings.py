@@ -31,11 +31,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ReadYourWritesMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,6 +74,26 @@ DATABASES = {
     }
 }
 
+# PRAGMA соединений SQLite: WAL, busy_timeout и др. (см. api/sqlite.py).
+SQLITE_TUNING = {
+    'ENABLED': True,
+    'SYNCHRONOUS': 'NORMAL',
+    'BUSY_TIMEOUT': 5000,
+}
+
+# Реплики для чтения - алиасы из DATABASES (см. api/db_routing.py).
+# Для локальной проверки подойдут копии db.sqlite3:
+# DATABASES['replica1'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': BASE_DIR / 'replica1.sqlite3',
+# }
+DATABASE_ROUTERS = ['api.db_routing.ReplicaRouter']
+DATABASE_ROUTING = {
+    'REPLICAS': (),
+    'STICKY_SECONDS': 5,
+    'RETRY_AFTER': 30,
+}
+
 
 # Password validation
 
@@ -94,13 +117,136 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CountedPageNumberPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
+# Списки произведений, отзывов и комментариев строятся по строкам
+# values() без создания экземпляров моделей (см. api/views.py).
+API_VALUES_LISTS = True
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'users',
+        'TIMEOUT': 30,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+# 'default' хранит версии справочников, журнал индекса фасетов, готовые
+# ответы и счётчики пагинации. LocMemCache подходит только для одного
+# процесса: при нескольких процессах (gunicorn -w N) нужен общий бэкенд,
+# иначе изменения в одном процессе не видны остальным до истечения
+# таймаутов.
+# manage.py check --deploy сообщает об этом ошибкой reviews.E001:
+# CACHES['default'] = {
+#     'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+#     'LOCATION': '127.0.0.1:11211',
+# }
+
+# Поля пользователя для аутентификации по JWT (см. api/authentication.py).
+# TRUST_TOKEN_CLAIMS - брать роль из токена без обращения к кэшу и БД.
+# Кэш 'users' локальный для процесса: изменение роли или блокировка
+# пользователя сбрасывается только в обработавшем его процессе, остальные
+# процессы видят прежние права до TIMEOUT секунд. Чтобы изменения
+# действовали сразу во всех процессах, укажите в ALIAS общий кэш.
+JWT_USER_CACHE = {
+    'ALIAS': 'users',
+    'TIMEOUT': 30,
+    'TRUST_TOKEN_CLAIMS': False,
+}
+
+# Общий кэш справочников жанров и категорий (см. reviews/cache.py).
+# CATALOG_CACHE_TIMEOUT - наибольший возраст снимка справочника в секундах.
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 60 * 5
+
+# Кэш готовых ответов на чтение произведений и отзывов для пользователей
+# без права записи (см. api/response_cache.py). Время - в секундах.
+RESPONSE_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 60,
+    'LOCK_WAIT': 5,
+}
+
+# Количество объектов для пагинации (см. api/pagination.py): MAX_AGE -
+# наибольшая задержка учёта изменений в обход сигналов, в секундах.
+PAGINATION_COUNT = {
+    'MAX_AGE': 30,
+    'QUERY_PARAM': 'count',
+}
+
+# Индекс фасетов произведений (см. reviews/facets.py), в секундах:
+# MAX_AGE - наибольший возраст индекса процесса, LOG_TIMEOUT - время
+# хранения журнала изменений в кэше CATALOG_CACHE_ALIAS.
+FACET_INDEX = {
+    'MAX_AGE': 300,
+    'LOG_TIMEOUT': 600,
+}
+
+# Объединение одновременных одинаковых запросов к спискам (см.
+# api/single_flight.py). SHARED - объединять и между процессами через кэш.
+SINGLE_FLIGHT = {
+    'ENABLED': True,
+    'SHARED': False,
+    'WAIT': 5,
+}
+
+# Профилирование запросов: Server-Timing и лог 'api.profiling'
+# (см. api/middleware.py). Пороговые значения - в миллисекундах.
+REQUEST_PROFILING = {
+    'ENABLED': False,
+    'MAX_QUERIES': 50,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_QUERY_MS': 100,
+}
+
+# Метрики Prometheus на /metrics/ (см. api/metrics.py). Для нескольких
+# рабочих процессов укажите общий каталог в MULTIPROCESS_DIR.
+API_METRICS = {
+    'ENABLED': True,
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 1.0,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'api.mail': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 # Internationalization
 
 LANGUAGE_CODE = 'ru'
@@ -127,6 +273,16 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 EMAIL_HOST_USER = 'admin_django@site.com'
 
+# Очередь исходящих писем (см. api/mail.py). MODE: 'thread' - доставка
+# фоновым потоком, 'worker' - процессом python manage.py send_outbox.
+EMAIL_OUTBOX = {
+    'MODE': 'thread',
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 30,
+    'MAX_RETRY_DELAY': 60 * 60,
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
     "AUTH_HEADER_TYPES": ("Bearer",),
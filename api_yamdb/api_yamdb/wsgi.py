@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
 application = get_wsgi_application()
+
+from api.mail import start_worker  # noqa: E402
+
+# Доставка писем, ожидающих в очереди с прошлого запуска.
+start_worker()
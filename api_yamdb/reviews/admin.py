@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import Category, Comment, Genre, OutboxEmail, Review, Title, User
 
 
 class ReviewAdmin(admin.ModelAdmin):
@@ -11,8 +11,14 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ('review_id', 'text', 'author', 'pub_date')
 
 
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'created_at', 'attempts',
+                    'sent_at')
+
+
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
 admin.site.register(Title)
 admin.site.register(Category)
 admin.site.register(Genre)
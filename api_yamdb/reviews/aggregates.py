@@ -0,0 +1,113 @@
+"""Денормализованные агрегаты отзывов и комментариев.
+
+В модели Title хранятся сумма и количество оценок и средняя оценка
+(индексируемая, для фильтров и сортировки), в модели Review - количество
+комментариев.
+"""
+
+from django.db.models import (Count, F, FloatField, IntegerField, OuterRef,
+                              Subquery, Sum)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from .models import Comment, Review, Title
+
+
+def average_rating(rating_sum, rating_count):
+    """Выражение средней оценки: NULL, если оценок нет."""
+    return (Cast(rating_sum, FloatField())
+            / Cast(NullIf(rating_count, 0), FloatField()))
+
+
+def change_title_rating(title_id, score_delta, count_delta=0):
+    """Атомарно изменяет сумму, количество оценок и среднюю оценку."""
+    if not score_delta and not count_delta:
+        return
+    rating_sum = F('rating_sum') + score_delta
+    rating_count = F('rating_count') + count_delta
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=average_rating(rating_sum, rating_count),
+        updated_at=timezone.now(),
+    )
+
+
+def _review_stats():
+    """Подзапросы с фактическими суммой и количеством оценок."""
+    reviews = (Review.objects.filter(title=OuterRef('pk'))
+               .order_by().values('title'))
+    real_sum = Subquery(reviews.annotate(s=Sum('score')).values('s'),
+                        output_field=IntegerField())
+    real_count = Subquery(reviews.annotate(c=Count('id')).values('c'),
+                          output_field=IntegerField())
+    return Coalesce(real_sum, 0), Coalesce(real_count, 0)
+
+
+def rebuild_title_ratings(titles=None):
+    """Пересчитывает агрегаты рейтинга с нуля одним UPDATE-запросом.
+
+    Возвращает количество обновлённых произведений.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    real_sum, real_count = _review_stats()
+    return titles.update(rating_sum=real_sum, rating_count=real_count,
+                         rating=average_rating(real_sum, real_count),
+                         updated_at=timezone.now())
+
+
+def find_rating_drift(titles=None):
+    """Находит произведения, у которых агрегаты расходятся с отзывами.
+
+    Возвращает список словарей с сохранёнными и фактическими значениями.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    real_sum, real_count = _review_stats()
+    return list(
+        titles.order_by()
+        .annotate(real_sum=real_sum, real_count=real_count)
+        .exclude(rating_sum=F('real_sum'), rating_count=F('real_count'))
+        .values('id', 'rating_sum', 'real_sum', 'rating_count',
+                'real_count')
+    )
+
+
+def change_review_comments(review_id, delta):
+    """Атомарно изменяет количество комментариев отзыва."""
+    Review.objects.filter(pk=review_id).update(
+        comments_count=F('comments_count') + delta,
+        updated_at=timezone.now())
+
+
+def _comment_count():
+    """Подзапрос с фактическим количеством комментариев отзыва."""
+    comments = (Comment.objects.filter(review=OuterRef('pk'))
+                .order_by().values('review'))
+    return Coalesce(
+        Subquery(comments.annotate(c=Count('id')).values('c'),
+                 output_field=IntegerField()), 0)
+
+
+def rebuild_comment_counts(reviews=None):
+    """Пересчитывает количество комментариев одним UPDATE-запросом.
+
+    Возвращает количество обновлённых отзывов.
+    """
+    if reviews is None:
+        reviews = Review.objects.all()
+    return reviews.update(comments_count=_comment_count(),
+                          updated_at=timezone.now())
+
+
+def find_comment_count_drift(reviews=None):
+    """Находит отзывы с неверным количеством комментариев."""
+    if reviews is None:
+        reviews = Review.objects.all()
+    return list(
+        reviews.order_by()
+        .annotate(real_count=_comment_count())
+        .exclude(comments_count=F('real_count'))
+        .values('id', 'comments_count', 'real_count')
+    )
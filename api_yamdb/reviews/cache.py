@@ -0,0 +1,102 @@
+"""Версионированный кэш справочников жанров и категорий.
+
+Справочник хранится в двух уровнях: в памяти процесса и в общем кэше
+Django (CATALOG_CACHE_ALIAS из настроек, по умолчанию 'default').
+Ключи содержат версию справочника, которая меняется при сохранении или
+удалении записи (см. signals.py), поэтому устаревшие данные не читаются.
+
+Версия видна другим процессам только при общем для них бэкенде кэша
+(см. checks.py). Независимо от этого снимок перечитывается из БД не
+реже чем раз в CATALOG_CACHE_TIMEOUT секунд.
+"""
+
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+CATALOG_FIELDS = ('id', 'name', 'slug')
+DEFAULT_TIMEOUT = 300
+
+
+class Catalog:
+    """Неизменяемый снимок справочника в порядке сортировки модели."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.by_id = {row['id']: row for row in rows}
+        self.position = {row['id']: index for index, row in enumerate(rows)}
+
+    def __contains__(self, pk):
+        return pk in self.by_id
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def _version_key(label):
+    return f'catalog:{label}:version'
+
+
+def get_version(model):
+    """Текущая версия справочника модели."""
+    return _shared_cache().get_or_set(
+        _version_key(model._meta.label_lower), time.time_ns(), timeout=None)
+
+
+def _bump(label):
+    _shared_cache().set(_version_key(label), time.time_ns(), timeout=None)
+
+
+def invalidate(model):
+    """Делает закэшированные снимки справочника устаревшими.
+
+    Версия меняется сразу и повторно после фиксации транзакции, чтобы
+    параллельный запрос не закэшировал данные до коммита с новой версией.
+    """
+    label = model._meta.label_lower
+    _bump(label)
+    transaction.on_commit(lambda: _bump(label))
+
+
+# Снимки процесса: метка модели -> (версия, срок годности, Catalog).
+_local = {}
+
+
+def _load_catalog(label, version):
+    """Снимок справочника версии version.
+
+    Срок годности отсчитывается от чтения из БД, поэтому снимок не
+    старше CATALOG_CACHE_TIMEOUT секунд на обоих уровнях.
+    """
+    now = time.time()
+    entry = _local.get(label)
+    if entry is not None and entry[0] == version and entry[1] > now:
+        return entry[2]
+    timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+    cache = _shared_cache()
+    key = f'catalog:{label}:{version}'
+    cached = cache.get(key)
+    if cached is None or cached[0] + timeout <= now:
+        model = apps.get_model(label)
+        cached = (now, tuple(model.objects.values(*CATALOG_FIELDS)))
+        cache.set(key, cached, timeout)
+    catalog = Catalog(cached[1])
+    _local[label] = (version, cached[0] + timeout, catalog)
+    return catalog
+
+
+def get_catalog(model, required_ids=()):
+    """Возвращает снимок справочника модели.
+
+    Если в снимке нет какого-либо из required_ids, справочник
+    перечитывается из БД.
+    """
+    catalog = _load_catalog(model._meta.label_lower, get_version(model))
+    if all(pk in catalog for pk in required_ids):
+        return catalog
+    invalidate(model)
+    return _load_catalog(model._meta.label_lower, get_version(model))
@@ -0,0 +1,26 @@
+"""Проверки настроек для развёртывания (manage.py check --deploy)."""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+# Бэкенды, данные которых не видны другим процессам.
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Версии справочников и журнал индекса фасетов должны храниться в
+    общем для процессов кэше."""
+    alias = getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')
+    if not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS):
+        return []
+    return [Error(
+        f'Кэш CATALOG_CACHE_ALIAS={alias!r} не общий для процессов: '
+        f'изменения справочников и фасетов в одном процессе не видны '
+        f'остальным.',
+        hint='Укажите в CACHES общий бэкенд, например PyMemcacheCache.',
+        id='reviews.E001',
+    )]
@@ -0,0 +1,235 @@
+"""Индекс фасетов произведений: жанр, категория и год.
+
+Для каждого значения фасета хранится множество id произведений, поэтому
+количество произведений по всем значениям для текущего выбора фильтров
+считается пересечением множеств в памяти, без GROUP BY по каждому фасету.
+
+Индекс строится в процессе двумя запросами и обновляется изменениями из
+сигналов (см. signals.py) после фиксации транзакции. Изменения получают
+номер (атомарный incr в общем кэше) и сохраняются в нём на LOG_TIMEOUT
+секунд, поэтому индексы других процессов догоняют их, применяя журнал,
+без перестроения. Индекс перестраивается, только если нужной записи
+журнала нет в кэше (после bulk-операций, см. invalidate) или если он
+старше MAX_AGE секунд. Операции идемпотентны: повторное применение
+изменения, уже прочитанного из БД при построении, ничего не меняет.
+
+Журнал виден другим процессам только при общем бэкенде кэша (см.
+checks.py), иначе их индексы отстают не больше чем на MAX_AGE секунд.
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import GenreTitle, Title
+
+FACET_INDEX_DEFAULTS = {
+    'MAX_AGE': 300,
+    'LOG_TIMEOUT': 600,
+}
+FACETS = ('genre', 'category', 'year')
+VERSION_KEY = 'facets:version'
+# Методы FacetIndex, которые можно записывать в журнал изменений.
+OPERATIONS = frozenset((
+    'set_title', 'remove_title', 'add_genre', 'remove_genre',
+    'clear_title_genres', 'clear_genre', 'remove_category',
+))
+
+
+def get_facet_index_settings():
+    return {**FACET_INDEX_DEFAULTS, **getattr(settings, 'FACET_INDEX', {})}
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def _current_version():
+    cache = _shared_cache()
+    cache.add(VERSION_KEY, 0, timeout=None)
+    return cache.get(VERSION_KEY, 0)
+
+
+def _next_version():
+    cache = _shared_cache()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # Ключ вытеснен из кэша: начинаем отсчёт заново.
+        cache.add(VERSION_KEY, 0, timeout=None)
+        return cache.incr(VERSION_KEY)
+
+
+def _change_key(version):
+    return f'facets:change:{version}'
+
+
+class FacetIndex:
+    """Множества id произведений по значениям фасетов."""
+
+    def __init__(self, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.titles = {}
+        self.genres_of = defaultdict(set)
+        self.sets = {facet: defaultdict(set) for facet in FACETS}
+
+    @classmethod
+    def build(cls, version):
+        index = cls(version)
+        for pk, category_id, year in Title.objects.values_list(
+                'id', 'category_id', 'year'):
+            index.set_title(pk, category_id, year)
+        for title_id, genre_id in GenreTitle.objects.values_list(
+                'title_id', 'genre_id'):
+            index.add_genre(title_id, genre_id)
+        return index
+
+    def set_title(self, pk, category_id, year):
+        previous = self.titles.get(pk)
+        if previous is not None:
+            self._discard('category', previous[0], pk)
+            self._discard('year', previous[1], pk)
+        self.titles[pk] = (category_id, year)
+        self.sets['category'][category_id].add(pk)
+        self.sets['year'][year].add(pk)
+
+    def remove_title(self, pk):
+        previous = self.titles.pop(pk, None)
+        if previous is not None:
+            self._discard('category', previous[0], pk)
+            self._discard('year', previous[1], pk)
+        for genre_id in self.genres_of.pop(pk, ()):
+            self._discard('genre', genre_id, pk)
+
+    def add_genre(self, title_id, genre_id):
+        self.genres_of[title_id].add(genre_id)
+        self.sets['genre'][genre_id].add(title_id)
+
+    def remove_genre(self, title_id, genre_id):
+        self.genres_of[title_id].discard(genre_id)
+        self._discard('genre', genre_id, title_id)
+
+    def clear_title_genres(self, title_id):
+        for genre_id in list(self.genres_of.get(title_id, ())):
+            self.remove_genre(title_id, genre_id)
+
+    def clear_genre(self, genre_id):
+        for title_id in list(self.sets['genre'].get(genre_id, ())):
+            self.remove_genre(title_id, genre_id)
+
+    def remove_category(self, category_id):
+        """Произведения удалённой категории остаются без категории."""
+        for pk in self.sets['category'].pop(category_id, ()):
+            self.set_title(pk, None, self.titles[pk][1])
+
+    def apply(self, operations):
+        """Применяет операции журнала: [(метод, *аргументы), ...]."""
+        for name, *args in operations:
+            if name not in OPERATIONS:
+                raise ValueError(f'Неизвестная операция индекса: {name}')
+            getattr(self, name)(*args)
+
+    def catch_up(self, version):
+        """Применяет журнал до версии version.
+
+        Возвращает False, если записей журнала уже (или ещё) нет в кэше.
+        """
+        if self.version == version:
+            return True
+        if self.version > version:
+            return False
+        keys = [_change_key(number)
+                for number in range(self.version + 1, version + 1)]
+        changes = _shared_cache().get_many(keys)
+        if len(changes) != len(keys):
+            return False
+        for key in keys:
+            self.apply(changes[key])
+        self.version = version
+        return True
+
+    def _discard(self, facet, value, pk):
+        values = self.sets[facet]
+        ids = values.get(value)
+        if ids is not None:
+            ids.discard(pk)
+            if not ids:
+                del values[value]
+
+    def counts(self, base_ids, selection):
+        """Количество произведений по значениям каждого фасета.
+
+        base_ids - id, подходящие под остальные фильтры (None - все);
+        selection - выбранные значения фасетов. Для фасета учитывается
+        выбор по всем остальным фасетам, но не по нему самому.
+        """
+        result = {}
+        for facet in FACETS:
+            candidates = [
+                self.sets[other].get(value, set())
+                for other, value in selection.items()
+                if other != facet and other in self.sets
+            ]
+            if base_ids is not None:
+                candidates.append(base_ids)
+            ids = (set.intersection(*sorted(candidates, key=len))
+                   if candidates else None)
+            result[facet] = {
+                value: len(titles if ids is None else titles & ids)
+                for value, titles in self.sets[facet].items()
+            }
+        return result
+
+
+_lock = threading.RLock()
+_index = None
+
+
+def get_counts(base_ids=None, selection=None):
+    """Количество произведений по фасетам (см. FacetIndex.counts)."""
+    global _index
+    max_age = get_facet_index_settings()['MAX_AGE']
+    version = _current_version()
+    with _lock:
+        if (_index is None
+                or time.monotonic() - _index.built_at >= max_age
+                or not _index.catch_up(version)):
+            _index = FacetIndex.build(version)
+        return _index.counts(base_ids, selection or {})
+
+
+def _apply(operations):
+    version = _next_version()
+    _shared_cache().set(_change_key(version), operations,
+                        get_facet_index_settings()['LOG_TIMEOUT'])
+    with _lock:
+        if _index is not None and _index.version == version - 1:
+            _index.apply(operations)
+            _index.version = version
+
+
+def record(*operations):
+    """Записывает операции индекса после фиксации транзакции.
+
+    Операция - кортеж (метод FacetIndex, *аргументы), например
+    ('set_title', pk, category_id, year).
+    """
+    operations = list(operations)
+    if operations:
+        transaction.on_commit(lambda: _apply(operations))
+
+
+def invalidate():
+    """Перестраивает индексы всех процессов (после bulk-операций).
+
+    Версия меняется без записи в журнал, поэтому догнать её нельзя.
+    """
+    global _index
+    with _lock:
+        _next_version()
+        _index = None
@@ -0,0 +1,418 @@
+"""
+Генерация больших синтетических наборов данных для нагрузочных замеров.
+
+python manage.py generate_data --users 1000000 --titles 200000 \
+    --reviews 5000000 --comments 10000000 --seed 42
+
+По умолчанию данные записываются прямо в БД многострочными INSERT (таблицы
+должны быть пустыми, например после python manage.py flush). С ключом
+--csv DIR вместо этого создаются файлы в формате static/data, которые
+загружаются командой load_all_data DIR.
+
+Один и тот же --seed всегда даёт одинаковый набор данных. Популярность
+произведений распределена по закону Ципфа (--skew): небольшая часть
+произведений собирает большую часть отзывов. Количество комментариев
+к отзыву имеет распределение Парето, поэтому итоговое число комментариев
+близко к --comments, но не равно ему.
+"""
+
+import csv
+import datetime as dt
+import os
+import random
+import sys
+import time
+from abc import ABC, abstractmethod
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Model
+from django.utils import timezone
+from reviews import cache, facets
+from reviews.aggregates import rebuild_comment_counts, rebuild_title_ratings
+from reviews.models import (MAX_REVIEW_SCORE, MIN_REVIEW_SCORE, Category,
+                            Comment, Genre, GenreTitle, Review, Title, User)
+from reviews.signals import data_changed
+
+CATEGORIES = (('Фильм', 'movie', 50), ('Книга', 'book', 25),
+              ('Музыка', 'music', 15), ('Сериал', 'series', 6),
+              ('Игра', 'game', 3), ('Спектакль', 'play', 1))
+GENRES = (('Драма', 'drama'), ('Комедия', 'comedy'),
+          ('Вестерн', 'western'), ('Фэнтези', 'fantasy'),
+          ('Фантастика', 'sci-fi'), ('Детектив', 'detective'),
+          ('Триллер', 'thriller'), ('Сказка', 'tale'), ('Гонзо', 'gonzo'),
+          ('Ужасы', 'horror'), ('Боевик', 'action'),
+          ('Мелодрама', 'romance'), ('Мультфильм', 'animation'),
+          ('Документальный', 'documentary'), ('Мюзикл', 'musical'),
+          ('Рок', 'rock'), ('Классика', 'classical'), ('Джаз', 'jazz'),
+          ('Приключения', 'adventure'), ('Исторический', 'history'))
+WORDS = ('время', 'город', 'дорога', 'звезда', 'зима', 'игра', 'история',
+         'лето', 'любовь', 'мир', 'море', 'ночь', 'огонь', 'остров',
+         'песня', 'побег', 'путь', 'река', 'сад', 'свет', 'сердце',
+         'солнце', 'тень', 'тайна', 'утро', 'ветер', 'война', 'дом',
+         'король', 'сон', 'последний', 'тихий', 'далёкий', 'белый',
+         'чёрный', 'старый', 'новый', 'долгий', 'красный', 'забытый',
+         'сильно', 'очень', 'снова', 'понравилось', 'скучно', 'смешно',
+         'рекомендую', 'шедевр', 'сюжет', 'актёры', 'финал', 'автор')
+FIRST_YEAR = 1900
+LAST_YEAR = 2023
+DATES_START = dt.datetime(2015, 1, 1, tzinfo=dt.timezone.utc)
+DATES_SPAN = 9 * 365 * 24 * 60 * 60
+COMMENT_DELAY = 30 * 24 * 60 * 60
+COMMENTS_PARETO_ALPHA = 1.5
+
+# Модель, имя файла и столбцы CSV (в формате static/data) с именами
+# соответствующих полей модели.
+TABLES = {
+    User: ('users.csv', (
+        ('id', 'id'), ('username', 'username'), ('email', 'email'),
+        ('role', 'role'), ('bio', 'bio'), ('first_name', 'first_name'),
+        ('last_name', 'last_name'))),
+    Category: ('category.csv', (
+        ('id', 'id'), ('name', 'name'), ('slug', 'slug'))),
+    Genre: ('genre.csv', (
+        ('id', 'id'), ('name', 'name'), ('slug', 'slug'))),
+    Title: ('titles.csv', (
+        ('id', 'id'), ('name', 'name'), ('year', 'year'),
+        ('category', 'category_id'), ('description', 'description'))),
+    GenreTitle: ('genre_title.csv', (
+        ('id', 'id'), ('title_id', 'title_id'), ('genre_id', 'genre_id'))),
+    Review: ('review.csv', (
+        ('id', 'id'), ('title_id', 'title_id'), ('text', 'text'),
+        ('author', 'author_id'), ('score', 'score'),
+        ('pub_date', 'pub_date'))),
+    Comment: ('comments.csv', (
+        ('id', 'id'), ('review_id', 'review_id'), ('text', 'text'),
+        ('author', 'author_id'), ('pub_date', 'pub_date'))),
+}
+
+
+class Writer(ABC):
+    """Накапливает строки таблицы и записывает их пакетами.
+
+    parents - записи родительских таблиц, которые сбрасываются первыми,
+    чтобы внешние ключи пакета ссылались на уже записанные строки.
+    """
+
+    def __init__(self, command, model: Model, batch_size: int,
+                 parents=()) -> None:
+        self.command = command
+        self.model = model
+        self.batch_size = batch_size
+        self.parents = parents
+        self.file_name, columns = TABLES[model]
+        self.headers = [column for column, _ in columns]
+        self.fields = [field for _, field in columns]
+        self.rows = []
+        self.written = 0
+        self.started = time.monotonic()
+
+    def add(self, *row) -> None:
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        for parent in self.parents:
+            parent.flush()
+        if not self.rows:
+            return
+        self.write(self.rows)
+        self.written += len(self.rows)
+        self.rows = []
+        elapsed: float = time.monotonic() - self.started
+        sys.stdout.write(
+            self.command.style.NOTICE(
+                f'{self.model.__name__}: записано {self.written}, '
+                f'{self.written / elapsed:.0f} строк/с\n'))
+
+    @abstractmethod
+    def write(self, rows: list) -> None:
+        """Записывает пакет строк."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class DatabaseWriter(Writer):
+    """Запись в БД многострочными INSERT без создания экземпляров моделей.
+
+    Поля, которых нет в строке, получают значения по умолчанию (поля
+    auto_now и auto_now_add - текущее время), defaults их переопределяет.
+    """
+
+    def __init__(self, *args, defaults: dict = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        defaults = defaults or {}
+        now = timezone.now()
+        opts = self.model._meta
+        fields = [opts.get_field(name) for name in self.fields]
+        self.datetime_fields = [
+            (index, field) for index, field in enumerate(fields)
+            if field.get_internal_type() == 'DateTimeField'
+        ]
+        self.extra_values = []
+        for field in opts.concrete_fields:
+            if field in fields:
+                continue
+            if field.attname in defaults:
+                value = defaults[field.attname]
+            elif (getattr(field, 'auto_now', False)
+                  or getattr(field, 'auto_now_add', False)):
+                value = now
+            else:
+                value = field.get_default()
+            fields.append(field)
+            self.extra_values.append(
+                field.get_db_prep_save(value, connection))
+        self.columns = ', '.join(connection.ops.quote_name(field.column)
+                                 for field in fields)
+        self.rows_per_insert = connection.ops.bulk_batch_size(
+            fields, [None] * self.batch_size)
+        self.placeholder = '(' + ', '.join(['%s'] * len(fields)) + ')'
+
+    def write(self, rows: list) -> None:
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        params = []
+        for row in rows:
+            row = list(row)
+            for index, field in self.datetime_fields:
+                row[index] = field.get_db_prep_save(row[index], connection)
+            params.append(row + self.extra_values)
+        with transaction.atomic(), connection.cursor() as cursor:
+            for start in range(0, len(params), self.rows_per_insert):
+                part = params[start:start + self.rows_per_insert]
+                cursor.execute(
+                    f'INSERT INTO {table} ({self.columns}) VALUES '
+                    + ', '.join([self.placeholder] * len(part)),
+                    [value for row in part for value in row])
+
+
+class CSVWriter(Writer):
+    """Запись в файл CSV, совместимый с load_data."""
+
+    def __init__(self, *args, data_dir: str, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.file = open(os.path.join(data_dir, self.file_name), 'w',
+                         encoding='UTF-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.headers)
+
+    def write(self, rows: list) -> None:
+        self.writer.writerows(
+            [format_csv_value(value) for value in row] for row in rows)
+
+    def close(self) -> None:
+        super().close()
+        self.file.close()
+
+
+def format_csv_value(value):
+    """Значение в формате файлов static/data."""
+    if isinstance(value, dt.datetime):
+        return (value.strftime('%Y-%m-%dT%H:%M:%S.')
+                + f'{value.microsecond // 1000:03d}Z')
+    return value
+
+
+class Command(BaseCommand):
+    help = ('Генерация воспроизводимого синтетического набора данных '
+            'заданного размера в БД или в файлы CSV.')
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--users', type=int, default=10000,
+                            help='Количество пользователей')
+        parser.add_argument('--titles', type=int, default=10000,
+                            help='Количество произведений')
+        parser.add_argument('--reviews', type=int, default=100000,
+                            help='Количество отзывов')
+        parser.add_argument('--comments', type=int, default=200000,
+                            help='Примерное количество комментариев')
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Показатель распределения Ципфа '
+                                 'популярности произведений')
+        parser.add_argument('--seed', type=int, default=1,
+                            help='Начальное значение генератора')
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Количество строк в одном пакете записи')
+        parser.add_argument('--csv', metavar='DIR',
+                            help='Записать файлы CSV в каталог DIR '
+                                 'вместо записи в БД')
+
+    def handle(self, *args, **options) -> None:
+        if options['users'] < 1 or options['titles'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь '
+                               'и одно произведение.')
+        if options['batch_size'] < 1:
+            raise CommandError('batch-size должен быть больше нуля')
+        data_dir: str = options['csv']
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+        else:
+            filled = [model.__name__ for model in TABLES
+                      if model.objects.exists()]
+            if filled:
+                raise CommandError(
+                    f'Таблицы {", ".join(filled)} не пусты. Очистите БД '
+                    f'(python manage.py flush) или используйте --csv.')
+
+        started: float = time.monotonic()
+        self.rnd = random.Random(options['seed'])
+        writers: dict = self.create_writers(data_dir, options['batch_size'])
+        self.generate_users(writers[User], options['users'])
+        self.generate_catalogs(writers[Category], writers[Genre])
+        self.generate_titles(writers[Title], writers[GenreTitle],
+                             options['titles'])
+        reviews: int = self.generate_reviews(
+            writers[Review], writers[Comment], options)
+        for writer in writers.values():
+            writer.close()
+
+        if not data_dir:
+            # Сигналы при записи не отправлялись: пересчитываем агрегаты
+            # и сбрасываем кэш справочников, индекс фасетов и кэши API.
+            self.reset_sequences()
+            rebuild_title_ratings()
+            rebuild_comment_counts()
+            cache.invalidate(Genre)
+            cache.invalidate(Category)
+            facets.invalidate()
+            data_changed.send(sender=Title)
+        elapsed: float = time.monotonic() - started
+        sys.stdout.write(
+            self.style.SUCCESS(
+                f'Создано: пользователей {writers[User].written}, '
+                f'произведений {writers[Title].written}, отзывов {reviews}, '
+                f'комментариев {writers[Comment].written} '
+                f'за {elapsed:.1f} с.\n'))
+
+    @staticmethod
+    def reset_sequences() -> None:
+        """Сдвигает последовательности id за записанные значения."""
+        statements: list = connection.ops.sequence_reset_sql(
+            no_style(), list(TABLES))
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def create_writers(self, data_dir: str, batch_size: int) -> dict:
+        writers = {}
+        parents = {Title: (Category,), GenreTitle: (Genre, Title),
+                   Review: (User, Title), Comment: (User, Review)}
+        for model in TABLES:
+            kwargs = {'parents': [writers[parent]
+                                  for parent in parents.get(model, ())]}
+            if data_dir:
+                writer_class = CSVWriter
+                kwargs['data_dir'] = data_dir
+            else:
+                writer_class = DatabaseWriter
+                if model is User:
+                    kwargs['defaults'] = {'password': make_password(None)}
+            writers[model] = writer_class(self, model, batch_size, **kwargs)
+        return writers
+
+    def words(self, low: int, high: int) -> str:
+        return ' '.join(self.rnd.choices(WORDS, k=self.rnd.randint(low,
+                                                                   high)))
+
+    def date(self) -> dt.datetime:
+        return DATES_START + dt.timedelta(
+            seconds=self.rnd.randrange(DATES_SPAN),
+            milliseconds=self.rnd.randrange(1000))
+
+    def generate_users(self, writer: Writer, count: int) -> None:
+        for pk in range(1, count + 1):
+            role = self.rnd.choices(('user', 'moderator', 'admin'),
+                                    (989, 10, 1))[0]
+            writer.add(pk, f'user_{pk}', f'user_{pk}@yamdb.fake', role,
+                       '', '', '')
+
+    def generate_catalogs(self, categories: Writer, genres: Writer) -> None:
+        for pk, (name, slug, _) in enumerate(CATEGORIES, start=1):
+            categories.add(pk, name, slug)
+        for pk, (name, slug) in enumerate(GENRES, start=1):
+            genres.add(pk, name, slug)
+
+    def generate_titles(self, titles: Writer, links: Writer,
+                        count: int) -> None:
+        category_weights = list(accumulate(
+            weight for _, _, weight in CATEGORIES))
+        # Популярность жанров тоже неравномерна.
+        genre_weights = list(accumulate(
+            1 / rank for rank in range(1, len(GENRES) + 1)))
+        genre_ids = range(1, len(GENRES) + 1)
+        link_id = 0
+        for pk in range(1, count + 1):
+            category = self.rnd.choices(range(1, len(CATEGORIES) + 1),
+                                        cum_weights=category_weights)[0]
+            titles.add(pk, self.words(1, 4).capitalize(),
+                       self.rnd.randint(FIRST_YEAR, LAST_YEAR), category,
+                       self.words(10, 40))
+            title_genres = set(self.rnd.choices(
+                genre_ids, cum_weights=genre_weights,
+                k=self.rnd.randint(1, 3)))
+            for genre in sorted(title_genres):
+                link_id += 1
+                links.add(link_id, pk, genre)
+
+    def reviews_per_title(self, titles: int, reviews: int, users: int,
+                          skew: float) -> list:
+        """Количество отзывов каждого произведения по закону Ципфа.
+
+        Ранги популярности назначаются произведениям случайно. Отзывов
+        у произведения не больше, чем пользователей (один отзыв автора на
+        произведение).
+        """
+        ranks = list(range(1, titles + 1))
+        self.rnd.shuffle(ranks)
+        weights = [rank ** -skew for rank in ranks]
+        total: float = sum(weights)
+        counts = [min(int(reviews * weight / total), users)
+                  for weight in weights]
+        # Остаток от округления отдаём самым популярным произведениям.
+        remainder: int = reviews - sum(counts)
+        for index in sorted(range(titles), key=ranks.__getitem__):
+            if remainder <= 0:
+                break
+            added: int = min(users - counts[index], remainder)
+            counts[index] += added
+            remainder -= added
+        return counts
+
+    def generate_reviews(self, reviews: Writer, comments: Writer,
+                         options: dict) -> int:
+        counts: list = self.reviews_per_title(
+            options['titles'], options['reviews'], options['users'],
+            options['skew'])
+        users = range(1, options['users'] + 1)
+        # Среднее распределения Парето с минимумом 1 равно
+        # alpha / (alpha - 1), приводим его к нужному числу комментариев.
+        alpha = COMMENTS_PARETO_ALPHA
+        mean_comments: float = options['comments'] / max(options['reviews'],
+                                                         1)
+        comments_scale: float = mean_comments * (alpha - 1) / alpha
+        review_id = comment_id = 0
+        for title_id, count in enumerate(counts, start=1):
+            quality: float = self.rnd.uniform(3, 9)
+            for author in self.rnd.sample(users, count):
+                review_id += 1
+                score = min(max(round(self.rnd.gauss(quality, 1.5)),
+                                MIN_REVIEW_SCORE), MAX_REVIEW_SCORE)
+                pub_date: dt.datetime = self.date()
+                reviews.add(review_id, title_id, self.words(5, 60), author,
+                            score, pub_date)
+                # Случайное округление сохраняет среднее значение.
+                comments_count = int(self.rnd.paretovariate(alpha)
+                                     * comments_scale + self.rnd.random())
+                for _ in range(comments_count):
+                    comment_id += 1
+                    comments.add(
+                        comment_id, review_id, self.words(3, 20),
+                        self.rnd.choice(users),
+                        pub_date + dt.timedelta(
+                            seconds=self.rnd.randrange(COMMENT_DELAY)))
+        return review_id
@@ -0,0 +1,153 @@
+"""
+Загрузка всех .csv файлов из каталога одной командой.
+
+python manage.py load_all_data static/data/ [--workers 4] [--chunk-size N]
+
+Порядок загрузки вычисляется по внешним ключам моделей reviews.models:
+таблицы одного уровня (например, User, Category и Genre) не зависят друг
+от друга и при --workers > 1 загружаются параллельно в отдельных процессах.
+
+Проверка внешних ключей:
+- PostgreSQL: каждый файл загружается в одной транзакции с
+  SET CONSTRAINTS ALL DEFERRED и без поиска внешних ключей по частям
+  (load_data --deferred-checks). Ограничения проверяет БД при фиксации
+  транзакции файла; при ошибке файл не загружается целиком.
+- SQLite: проверка ограничений отключается на время загрузки, строки с
+  несуществующими внешними ключами пропускаются load_data, в конце
+  ограничения загруженных таблиц проверяются один раз.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from graphlib import TopologicalSorter
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, connections, transaction
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+
+def _init_worker() -> None:
+    """Настраивает Django в дочернем процессе."""
+    django.setup()
+
+
+def _load_file(model_name: str, file_path: str, chunk_size: int) -> str:
+    """Загружает один файл в потоковом режиме."""
+    if connection.vendor != 'postgresql':
+        with connection.constraint_checks_disabled():
+            call_command('load_data', model_name, file_path,
+                         stream=True, chunk_size=chunk_size)
+        return model_name
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+            call_command('load_data', model_name, file_path,
+                         stream=True, chunk_size=chunk_size,
+                         deferred_checks=True)
+    except IntegrityError as e:
+        raise CommandError(f'{model_name}: файл не загружен, '
+                           f'нарушены ограничения БД: {e}')
+    return model_name
+
+
+class Command(BaseCommand):
+    help = ('Загрузка всех CSV файлов из каталога в порядке зависимостей '
+            'моделей. Укажите путь до каталога.')
+
+    # Имена файлов с данными для каждой модели.
+    DATA_FILES = {
+        User: 'users.csv',
+        Category: 'category.csv',
+        Genre: 'genre.csv',
+        Title: 'titles.csv',
+        GenreTitle: 'genre_title.csv',
+        Review: 'review.csv',
+        Comment: 'comments.csv',
+    }
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('data_dir', type=str,
+                            help='Путь до каталога с файлами CSV')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Количество параллельных процессов')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Количество строк в одной части')
+
+    def handle(self, *args, **options) -> None:
+        data_dir: str = options['data_dir']
+        if not os.path.isdir(data_dir):
+            raise CommandError(f'Каталог {data_dir} не найден')
+        workers: int = options['workers']
+        if workers > 1 and connection.vendor == 'sqlite':
+            sys.stdout.write(
+                self.style.WARNING(
+                    'SQLite не поддерживает параллельную запись, '
+                    'загрузка будет выполнена в одном процессе.\n'))
+            workers = 1
+
+        started: float = time.monotonic()
+        files: dict = self.get_data_files(data_dir)
+        for level in self.get_load_order(files):
+            self.load_level(level, files, workers, options['chunk_size'])
+        if connection.vendor != 'postgresql':
+            connection.check_constraints(
+                table_names=[model._meta.db_table for model in files])
+        elapsed: float = time.monotonic() - started
+        sys.stdout.write(
+            self.style.SUCCESS(f'Загрузка завершена за {elapsed:.1f} с.\n'))
+
+    def get_data_files(self, data_dir: str) -> dict:
+        """Возвращает существующие файлы данных для моделей."""
+        files = {}
+        for model, file_name in self.DATA_FILES.items():
+            file_path: str = os.path.join(data_dir, file_name)
+            if os.path.isfile(file_path):
+                files[model] = file_path
+            else:
+                sys.stdout.write(
+                    self.style.NOTICE(f'Файл {file_path} не найден.\n'))
+        return files
+
+    @staticmethod
+    def get_load_order(models) -> list:
+        """Разбивает модели на уровни по графу внешних ключей.
+
+        Модели одного уровня зависят только от моделей предыдущих уровней.
+        """
+        graph = TopologicalSorter()
+        for model in models:
+            graph.add(model, *(
+                field.related_model for field in model._meta.concrete_fields
+                if field.many_to_one and field.related_model in models
+                and field.related_model is not model
+            ))
+        graph.prepare()
+        levels = []
+        while graph.is_active():
+            level: tuple = graph.get_ready()
+            levels.append(sorted(level, key=lambda model: model.__name__))
+            graph.done(*level)
+        return levels
+
+    def load_level(self, level: list, files: dict, workers: int,
+                   chunk_size: int) -> None:
+        """Загружает независимые друг от друга таблицы одного уровня."""
+        jobs = [(model.__name__, files[model], chunk_size)
+                for model in level]
+        if workers == 1 or len(jobs) == 1:
+            for job in jobs:
+                _load_file(*job)
+            return
+        # Дочерние процессы открывают собственные соединения с БД.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 initializer=_init_worker) as executor:
+            for model_name in executor.map(_load_file, *zip(*jobs)):
+                sys.stdout.write(
+                    self.style.NOTICE(f'Модель {model_name} загружена.\n'))
@@ -14,18 +14,33 @@ python manage.py load_data Title static/data/titles.csv
 python manage.py load_data Review static/data/review.csv
 python manage.py load_data Comment static/data/comments.csv
 python manage.py load_data GenreTitle static/data/genre_title.csv
+
+Для больших файлов используйте потоковый режим:
+python manage.py load_data Review review.csv --stream --chunk-size 10000
+Файл читается частями, существование записей и внешние ключи проверяются
+одним запросом на часть, каждая часть записывается в своей транзакции.
+С ключом --deferred-checks внешние ключи по частям не проверяются: команда
+вызывается внутри общей транзакции, и ограничения DEFERRABLE (так Django
+создаёт внешние ключи) проверяет БД при её фиксации (см. load_all_data).
+
+Все файлы каталога в нужном порядке загружает команда load_all_data.
 """
 
 import csv
 import sys
+import time
+from itertools import islice
 
 from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.management.base import BaseCommand, CommandError
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.db.models import Model
+from reviews import facets
+from reviews.aggregates import rebuild_comment_counts, rebuild_title_ratings
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, User)
+from reviews.signals import data_changed
 
 
 class Command(BaseCommand):
@@ -42,30 +57,69 @@ class Command(BaseCommand):
         Comment: {'review': (Review, 'review_id'), 'author': (User, 'author')},
     }
 
+    DEFAULT_CHUNK_SIZE = 5000
+
     def add_arguments(self, parser) -> None:
         parser.add_argument('model', type=str,
                             help='Имя модели')
         parser.add_argument('file_path', type=str,
                             help='Путь до файла CSV')
+        parser.add_argument('--stream', action='store_true',
+                            help='Потоковая загрузка частями')
+        parser.add_argument('--chunk-size', type=int,
+                            default=self.DEFAULT_CHUNK_SIZE,
+                            help='Количество строк в одной части')
+        parser.add_argument('--deferred-checks', action='store_true',
+                            help='Не проверять внешние ключи по частям '
+                                 '(их проверит БД при фиксации транзакции)')
 
     def handle(self, *args, **options) -> None:
         model_name: str = options['model']
         file_path: str = options['file_path']
-        self.load_data(model_name, file_path)
-
-    def load_data(self, model_name: str, file_path: str) -> None:
-        """Записывает данные из csv файла в БД."""
+        if options['stream']:
+            self.load_data_stream(model_name, file_path,
+                                  options['chunk_size'],
+                                  check_keys=not options['deferred_checks'])
+        else:
+            self.load_data(model_name, file_path)
+
+    @staticmethod
+    def get_model(model_name: str) -> Model:
+        """Возвращает модель приложения reviews по имени."""
         try:
-            model: Model = apps.get_model(app_label='reviews',
-                                          model_name=model_name)
+            return apps.get_model(app_label='reviews', model_name=model_name)
         except LookupError:
             raise CommandError(f'Model {model_name} not found')
 
+    @staticmethod
+    def rebuild_aggregates(model: Model) -> None:
+        """Пересчитывает агрегаты, зависящие от загруженной модели.
+
+        bulk_create не отправляет сигналы моделей, поэтому кэши сбрасываются
+        по сигналу data_changed.
+        """
+        if model is Review:
+            rebuild_title_ratings()
+        elif model is Comment:
+            rebuild_comment_counts()
+        elif model in (Title, GenreTitle):
+            # Индексы других процессов перестраиваются по данным после
+            # фиксации общей транзакции загрузки.
+            transaction.on_commit(facets.invalidate)
+        data_changed.send(sender=model)
+
+    def load_data(self, model_name: str, file_path: str) -> None:
+        """Записывает данные из csv файла в БД."""
+        model: Model = self.get_model(model_name)
+
         objects_list: list = self.__create_objects_list_from_file(
             model, file_path)
 
         try:
             model.objects.bulk_create(objects_list)
+            # bulk_create не отправляет сигналы, поэтому агрегаты
+            # пересчитываются отдельно.
+            self.rebuild_aggregates(model)
         except IntegrityError as e:
             sys.stdout.write(
                 self.style.WARNING(
@@ -104,3 +158,87 @@ class Command(BaseCommand):
                 objects_list.append(model(**row))
 
         return objects_list
+
+    def load_data_stream(self, model_name: str, file_path: str,
+                         chunk_size: int, check_keys: bool = True) -> None:
+        """Записывает данные из csv файла в БД частями по chunk_size строк."""
+        if chunk_size < 1:
+            raise CommandError('chunk-size должен быть больше нуля')
+        model: Model = self.get_model(model_name)
+        started: float = time.monotonic()
+        processed = created = 0
+        with open(file_path, 'r', encoding='UTF-8') as f:
+            reader: csv.DictReader = csv.DictReader(f)
+            while True:
+                rows: list = list(islice(reader, chunk_size))
+                if not rows:
+                    break
+                objects_list: list = self.__create_objects_list_from_chunk(
+                    model, rows, check_keys)
+                try:
+                    with transaction.atomic():
+                        model.objects.bulk_create(objects_list,
+                                                  batch_size=chunk_size)
+                except IntegrityError as e:
+                    sys.stdout.write(
+                        self.style.WARNING(
+                            f'Часть файла не записана, проверьте БД:{e}\n'))
+                else:
+                    created += len(objects_list)
+                processed += len(rows)
+                elapsed: float = time.monotonic() - started
+                sys.stdout.write(
+                    self.style.NOTICE(
+                        f'Обработано строк: {processed}, записано: '
+                        f'{created}, {processed / elapsed:.0f} строк/с\n'))
+
+        self.rebuild_aggregates(model)
+        sys.stdout.write(
+            self.style.NOTICE(f'Данные из файла {file_path} обработаны.\n'))
+
+    def __create_objects_list_from_chunk(self, model: Model, rows: list,
+                                         check_keys: bool = True) -> list:
+        """Формирует список новых объектов из части файла csv.
+
+        Существующие записи и (при check_keys) внешние ключи проверяются
+        одним запросом на каждую таблицу.
+        """
+        existing_ids: set = self.__existing_ids(
+            model, {row['id'] for row in rows})
+        checked_keys: dict = (self.MODELS_SWAP_FIELDS.get(model, {})
+                              if check_keys else {})
+        missing_keys: dict = {}
+        for related_model, column in checked_keys.values():
+            keys: set = {row[column] for row in rows}
+            missing_keys[column] = keys - self.__existing_ids(
+                related_model, keys)
+
+        objects_list = []
+        for row in rows:
+            if row['id'] in existing_ids:
+                sys.stdout.write(
+                    self.style.NOTICE(
+                        f'Объект с id = {row["id"]} уже существует.\n'))
+                continue
+            if any(row[column] in missing
+                   for column, missing in missing_keys.items()):
+                sys.stdout.write(
+                    self.style.NOTICE(
+                        f'Объект по внешнему ключу не найден.\n'
+                        f'Проверьте связанные таблицы.\n'
+                        f'Запись не добавлена: {row}\n'))
+                continue
+            for fld, (_, column) in self.MODELS_SWAP_FIELDS.get(
+                    model, {}).items():
+                row[f'{fld}_id'] = row.pop(column)
+            objects_list.append(model(**row))
+
+        return objects_list
+
+    @staticmethod
+    def __existing_ids(model: Model, ids: set) -> set:
+        """Возвращает id из переданного набора, которые уже есть в БД."""
+        return {
+            str(pk) for pk in
+            model.objects.filter(id__in=ids).values_list('id', flat=True)
+        }
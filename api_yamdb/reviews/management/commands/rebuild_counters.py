@@ -0,0 +1,62 @@
+"""
+Пересчёт и проверка денормализованных счётчиков отзывов и комментариев.
+
+python manage.py rebuild_counters          - пересчитать счётчики с нуля;
+python manage.py rebuild_counters --check  - только найти расхождения.
+
+Количество отзывов произведения (reviews_count) хранится вместе с суммой
+оценок, поэтому пересчитывается вместе с рейтингом.
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reviews.aggregates import (find_comment_count_drift, find_rating_drift,
+                                rebuild_comment_counts, rebuild_title_ratings)
+from reviews.models import Review
+from reviews.signals import data_changed
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт количества отзывов произведений и комментариев '
+            'к отзывам. С ключом --check только проверяет согласованность '
+            'данных.')
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить расхождения')
+
+    def handle(self, *args, **options) -> None:
+        if options['check']:
+            self.check_drift()
+            return
+        with transaction.atomic():
+            titles: int = rebuild_title_ratings()
+            reviews: int = rebuild_comment_counts()
+            data_changed.send(sender=Review)
+        sys.stdout.write(
+            self.style.SUCCESS(f'Счётчики пересчитаны: произведений - '
+                               f'{titles}, отзывов - {reviews}.\n'))
+
+    def check_drift(self) -> None:
+        """Выводит объекты с рассогласованными счётчиками."""
+        title_drift: list = [row for row in find_rating_drift()
+                             if row['rating_count'] != row['real_count']]
+        review_drift: list = find_comment_count_drift()
+        if not title_drift and not review_drift:
+            sys.stdout.write(self.style.SUCCESS('Расхождений не найдено.\n'))
+            return
+        for row in title_drift:
+            sys.stdout.write(
+                self.style.WARNING(
+                    f'Title id={row["id"]}: отзывов '
+                    f'{row["rating_count"]} != {row["real_count"]}\n'))
+        for row in review_drift:
+            sys.stdout.write(
+                self.style.WARNING(
+                    f'Review id={row["id"]}: комментариев '
+                    f'{row["comments_count"]} != {row["real_count"]}\n'))
+        raise CommandError(
+            f'Найдено расхождений: {len(title_drift) + len(review_drift)}. '
+            f'Запустите rebuild_counters без --check.')
@@ -0,0 +1,49 @@
+"""
+Пересчёт и проверка денормализованного рейтинга произведений.
+
+python manage.py rebuild_ratings          - пересчитать агрегаты с нуля;
+python manage.py rebuild_ratings --check  - только найти расхождения.
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.aggregates import find_rating_drift, rebuild_title_ratings
+from reviews.models import Title
+from reviews.signals import data_changed
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт суммы и количества оценок произведений по отзывам. '
+            'С ключом --check только проверяет согласованность данных.')
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить расхождения')
+
+    def handle(self, *args, **options) -> None:
+        if options['check']:
+            self.check_drift()
+            return
+        updated: int = rebuild_title_ratings()
+        data_changed.send(sender=Title)
+        sys.stdout.write(
+            self.style.SUCCESS(f'Рейтинг пересчитан для {updated} '
+                               f'произведений.\n'))
+
+    def check_drift(self) -> None:
+        """Выводит произведения с рассогласованным рейтингом."""
+        drift: list = find_rating_drift()
+        if not drift:
+            sys.stdout.write(self.style.SUCCESS('Расхождений не найдено.\n'))
+            return
+        for row in drift:
+            sys.stdout.write(
+                self.style.WARNING(
+                    f'Title id={row["id"]}: '
+                    f'сумма {row["rating_sum"]} != {row["real_sum"]}, '
+                    f'количество {row["rating_count"]} != '
+                    f'{row["real_count"]}\n'))
+        raise CommandError(
+            f'Найдено расхождений: {len(drift)}. '
+            f'Запустите rebuild_ratings без --check.')
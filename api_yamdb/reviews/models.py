@@ -2,8 +2,9 @@
 
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import UniqueConstraint
+from django.utils import timezone
 
 MIN_REVIEW_SCORE = 1
 MAX_REVIEW_SCORE = 10
@@ -50,6 +51,8 @@ class Category(models.Model):
 
     name = models.CharField(max_length=256, verbose_name='Категория')
     slug = models.SlugField(max_length=50, unique=True, verbose_name='Слаг')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
 
     class Meta:
         verbose_name = 'Категории'
@@ -64,6 +67,8 @@ class Genre(models.Model):
 
     name = models.CharField(max_length=256, verbose_name='Жанр')
     slug = models.SlugField(max_length=50, unique=True, verbose_name='Слаг')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
 
     class Meta:
         verbose_name = 'Жанры'
@@ -85,10 +90,24 @@ class Title(models.Model):
     category = models.ForeignKey(
         Category, related_name='titles', on_delete=models.SET_NULL,
         null=True, verbose_name='Категория')
+    rating_sum = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Сумма оценок')
+    rating_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество оценок')
+    rating = models.FloatField(
+        null=True, editable=False, db_index=True,
+        verbose_name='Средняя оценка')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True,
+                                      verbose_name='Дата изменения')
 
     class Meta:
         verbose_name = 'Произведение'
         ordering = ('name', 'year')
+        indexes = [
+            # Фильтр по категории с диапазоном или сортировкой по рейтингу.
+            models.Index(fields=('category', 'rating'),
+                         name='title_category_rating_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -104,6 +123,11 @@ class GenreTitle(models.Model):
 
     class Meta:
         ordering = ('title',)
+        indexes = [
+            # Покрывающий индекс: id произведений жанра без чтения таблицы.
+            models.Index(fields=('genre', 'title'),
+                         name='genretitle_genre_title_idx'),
+        ]
 
     def __str__(self):
         return f'{self.genre} {self.title}'
@@ -137,6 +161,10 @@ class Review(models.Model):
         auto_now_add=True,
         db_index=True
     )
+    comments_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество комментариев')
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
 
     class Meta:
         ordering = ('-pub_date', '-id')
@@ -146,10 +174,20 @@ class Review(models.Model):
             UniqueConstraint(fields=('title', 'author'),
                              name='unique_title_and_author')
         ]
+        indexes = [
+            models.Index(fields=('title', '-pub_date', '-id'),
+                         name='review_title_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[SLICE_TEXT_FIELD]
 
+    def save(self, *args, **kwargs):
+        # Отзыв и агрегаты рейтинга произведения (см. signals.py)
+        # должны сохраняться в одной транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель комментариев к отзывам."""
@@ -173,11 +211,56 @@ class Comment(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(auto_now=True,
+                                      verbose_name='Дата изменения')
 
     class Meta:
         ordering = ('-pub_date', '-id')
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=('review', '-pub_date', '-id'),
+                         name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[SLICE_TEXT_FIELD]
+
+    def save(self, *args, **kwargs):
+        # Комментарий и счётчик комментариев отзыва (см. signals.py)
+        # должны сохраняться в одной транзакции.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class OutboxEmail(models.Model):
+    """Очередь исходящих писем (см. api/mail.py)."""
+
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(verbose_name='Отправитель')
+    recipient = models.EmailField(verbose_name='Получатель')
+    created_at = models.DateTimeField(auto_now_add=True,
+                                      verbose_name='Создано')
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Следующая попытка')
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Количество попыток')
+    last_error = models.TextField(blank=True,
+                                  verbose_name='Последняя ошибка')
+    sent_at = models.DateTimeField(null=True, blank=True,
+                                   verbose_name='Отправлено')
+    lock_token = models.CharField(max_length=32, blank=True,
+                                  verbose_name='Метка обработчика')
+
+    class Meta:
+        ordering = ('next_attempt_at', 'id')
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(fields=('sent_at', 'next_attempt_at'),
+                         name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
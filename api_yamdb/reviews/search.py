@@ -0,0 +1,112 @@
+"""Полнотекстовый поиск по названию и описанию произведений.
+
+SQLite: виртуальная таблица FTS5 с внешним содержимым (reviews_title) и
+триггерами, которые синхронизируют индекс при любой записи в таблицу.
+PostgreSQL: GIN-индекс по выражению to_tsvector от названия (вес A) и
+описания (вес B).
+Для остальных СУБД используется поиск icontains.
+
+Индекс создаётся после миграций (см. signals.py), так как пересоздание
+таблицы при миграциях SQLite удаляет её триггеры.
+"""
+
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+
+from .models import Title
+
+FTS_TABLE = 'reviews_title_fts'
+PG_INDEX = 'reviews_title_search_gin'
+PG_VECTOR = ("setweight(to_tsvector('simple', "
+             "coalesce(reviews_title.name, '')), 'A') || "
+             "setweight(to_tsvector('simple', "
+             "coalesce(reviews_title.description, '')), 'B')")
+# Вес совпадения в названии относительно совпадения в описании (SQLite).
+NAME_WEIGHT = 10.0
+
+SQLITE_INDEX_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"name, description, content='reviews_title', content_rowid='id', "
+    f"tokenize='unicode61')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai "
+    f"AFTER INSERT ON reviews_title BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) "
+    f"VALUES (new.id, new.name, new.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad "
+    f"AFTER DELETE ON reviews_title BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    f"AFTER UPDATE OF name, description ON reviews_title BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description) "
+    f"VALUES (new.id, new.name, new.description); END",
+)
+
+
+def install_search_index(using=DEFAULT_DB_ALIAS):
+    """Создаёт поисковый индекс, если его ещё нет."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master "
+                "WHERE type = 'trigger' AND name LIKE %s",
+                [f'{FTS_TABLE}_a_'])
+            triggers_installed = cursor.fetchone()[0] == 3
+            for sql in SQLITE_INDEX_SQL:
+                cursor.execute(sql)
+            if not triggers_installed:
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) "
+                    f"VALUES ('rebuild')")
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {PG_INDEX} '
+                f'ON reviews_title USING GIN (({PG_VECTOR}))')
+
+
+def get_terms(text):
+    """Разбивает поисковую строку на слова."""
+    return re.findall(r'\w+', text.lower())
+
+
+def search_titles(queryset, text):
+    """Фильтрует произведения по словам из text.
+
+    Каждое слово ищется как префикс, результат упорядочен по
+    релевантности (аннотация search_rank, больше - релевантнее);
+    совпадения в названии важнее совпадений в описании.
+    """
+    terms = get_terms(text)
+    if not terms:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # Соединение с индексом FTS5; bm25() возвращает отрицательные
+        # значения: меньше - релевантнее.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = reviews_title.id',
+                   f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank':
+                    f'-bm25({FTS_TABLE}, {NAME_WEIGHT}, 1.0)'},
+        ).order_by('-search_rank', *Title._meta.ordering)
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.extra(
+            where=[f"{PG_VECTOR} @@ to_tsquery('simple', %s)"],
+            params=[tsquery],
+            select={'search_rank':
+                    f"ts_rank({PG_VECTOR}, to_tsquery('simple', %s))"},
+            select_params=[tsquery],
+        ).order_by('-search_rank', *Title._meta.ordering)
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition)
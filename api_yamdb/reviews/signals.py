@@ -0,0 +1,144 @@
+"""Обработчики сигналов, поддерживающие агрегаты и кэши."""
+
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save, pre_save)
+from django.dispatch import Signal, receiver
+
+from . import cache, facets
+from .aggregates import change_review_comments, change_title_rating
+from .models import Category, Comment, Genre, GenreTitle, Review, Title
+from .search import install_search_index
+
+# Отправляется после массовых изменений модели sender в обход сигналов
+# моделей (загрузка и генерация данных, пересчёт агрегатов).
+data_changed = Signal()
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, raw, **kwargs):
+    """Запоминает прежние оценку и произведение редактируемого отзыва."""
+    instance._previous_rating = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_rating = (
+        Review.objects.filter(pk=instance.pk)
+        .values_list('title_id', 'score').first()
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    """Учитывает новый отзыв или изменение оценки в рейтинге."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if created or previous is None:
+        change_title_rating(instance.title_id, instance.score, 1)
+        return
+    old_title_id, old_score = previous
+    if old_title_id != instance.title_id:
+        change_title_rating(old_title_id, -old_score, -1)
+        change_title_rating(instance.title_id, instance.score, 1)
+    else:
+        change_title_rating(instance.title_id, instance.score - old_score)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключает удалённый отзыв (в том числе каскадно) из рейтинга."""
+    change_title_rating(instance.title_id, -instance.score, -1)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_review(sender, instance, raw, **kwargs):
+    """Запоминает прежний отзыв редактируемого комментария."""
+    instance._previous_review_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_review_id = (
+        Comment.objects.filter(pk=instance.pk)
+        .values_list('review_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, raw, **kwargs):
+    """Учитывает новый или перенесённый комментарий в счётчике отзыва."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_review_id', None)
+    if created or previous is None:
+        change_review_comments(instance.review_id, 1)
+    elif previous != instance.review_id:
+        change_review_comments(previous, -1)
+        change_review_comments(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, **kwargs):
+    """Исключает удалённый комментарий (в том числе каскадно) из счётчика."""
+    change_review_comments(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog(sender, **kwargs):
+    """Сбрасывает кэш справочника при изменении жанра или категории."""
+    cache.invalidate(sender)
+
+
+@receiver(post_save, sender=Title)
+def update_facets_on_title_save(sender, instance, raw, **kwargs):
+    """Учитывает категорию и год произведения в индексе фасетов."""
+    facets.record(('set_title', instance.pk, instance.category_id,
+                   instance.year))
+
+
+@receiver(post_delete, sender=Title)
+def update_facets_on_title_delete(sender, instance, **kwargs):
+    """Исключает удалённое произведение из индекса фасетов."""
+    facets.record(('remove_title', instance.pk))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_facets_on_genres_change(sender, instance, action, reverse,
+                                   pk_set, **kwargs):
+    """Учитывает изменение жанров произведений в индексе фасетов."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    pk = instance.pk
+    if action == 'post_clear':
+        facets.record(('clear_genre', pk) if reverse
+                      else ('clear_title_genres', pk))
+        return
+    operation = 'add_genre' if action == 'post_add' else 'remove_genre'
+    facets.record(*(
+        (operation, other, pk) if reverse else (operation, pk, other)
+        for other in pk_set or ()))
+
+
+@receiver(post_save, sender=GenreTitle)
+def update_facets_on_genre_title_save(sender, instance, raw, **kwargs):
+    """Учитывает связь жанра и произведения в индексе фасетов."""
+    facets.record(('add_genre', instance.title_id, instance.genre_id))
+
+
+@receiver(post_delete, sender=GenreTitle)
+def update_facets_on_genre_title_delete(sender, instance, **kwargs):
+    """Исключает связь (в том числе каскадно) из индекса фасетов."""
+    facets.record(('remove_genre', instance.title_id, instance.genre_id))
+
+
+@receiver(post_delete, sender=Category)
+def update_facets_on_category_delete(sender, instance, **kwargs):
+    """Переносит произведения удалённой категории в индексе фасетов."""
+    facets.record(('remove_category', instance.pk))
+
+
+@receiver(post_migrate)
+def install_title_search(sender, using, **kwargs):
+    """Создаёт полнотекстовый индекс произведений после миграций."""
+    if sender.label == 'reviews':
+        install_search_index(using)
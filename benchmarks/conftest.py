@@ -0,0 +1,154 @@
+"""Общие настройки и фикстуры нагрузочных замеров.
+
+Замеры запускаются отдельно от тестов корректности:
+
+pytest benchmarks/ [--bench-scale 10] [--bench-requests 500]
+
+Перед замерами в тестовую БД командой generate_data записывается набор
+данных размера --bench-scale. Результаты сохраняются в JSON
+(--bench-output) и сравниваются с сохранённым эталоном (--bench-baseline):
+замер падает, если его p95 хуже эталонного больше чем на --bench-tolerance.
+С ключом --bench-save-baseline результаты записываются как новый эталон.
+
+Кэш готовых ответов (RESPONSE_CACHE) на время замеров отключён: иначе
+анонимные запросы на чтение измеряли бы попадания в кэш, а не сами
+представления.
+"""
+
+import json
+import os
+import statistics
+import time
+from io import StringIO
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+# Размер набора данных при --bench-scale 1.
+DATASET = {'users': 2000, 'titles': 1000, 'reviews': 20000,
+           'comments': 40000}
+WARMUP_REQUESTS = 10
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmarks', 'Нагрузочные замеры API')
+    group.addoption('--bench-scale', type=int, default=1,
+                    help='Множитель размера набора данных')
+    group.addoption('--bench-requests', type=int, default=200,
+                    help='Количество запросов в каждом замере')
+    group.addoption('--bench-output',
+                    default=os.path.join(BENCH_DIR, 'results.json'),
+                    help='Файл для результатов замеров')
+    group.addoption('--bench-baseline',
+                    default=os.path.join(BENCH_DIR, 'baseline.json'),
+                    help='Файл с эталонными результатами')
+    group.addoption('--bench-tolerance', type=float, default=0.5,
+                    help='Допустимое ухудшение p95 относительно эталона')
+    group.addoption('--bench-save-baseline', action='store_true',
+                    help='Сохранить результаты как новый эталон')
+
+
+class BenchmarkRun:
+    """Результаты замеров одного запуска."""
+
+    def __init__(self, config):
+        self.config = config
+        self.scale = config.getoption('--bench-scale')
+        self.requests = config.getoption('--bench-requests')
+        self.tolerance = config.getoption('--bench-tolerance')
+        self.results = {}
+        self.baseline = {}
+        baseline_path = config.getoption('--bench-baseline')
+        if (not config.getoption('--bench-save-baseline')
+                and os.path.isfile(baseline_path)):
+            with open(baseline_path, encoding='utf-8') as f:
+                baseline = json.load(f)
+            # Сравнивать можно только замеры на наборе того же размера.
+            if baseline.get('scale') == self.scale:
+                self.baseline = baseline['results']
+
+    def measure(self, name, make_request, expected_status):
+        """Выполняет запрос make_request(i) --bench-requests раз.
+
+        Возвращает и сохраняет пропускную способность и перцентили
+        времени ответа.
+        """
+        for i in range(WARMUP_REQUESTS):
+            make_request(-i - 1)
+        durations = []
+        started = time.perf_counter()
+        for i in range(self.requests):
+            request_started = time.perf_counter()
+            response = make_request(i)
+            durations.append(time.perf_counter() - request_started)
+            assert response.status_code == expected_status, (
+                f'{name}: ответ {response.status_code}, '
+                f'ожидался {expected_status}')
+        elapsed = time.perf_counter() - started
+        percentiles = statistics.quantiles(durations, n=100,
+                                           method='inclusive')
+        result = {
+            'requests': self.requests,
+            'throughput_rps': round(self.requests / elapsed, 1),
+            'p50_ms': round(percentiles[49] * 1000, 3),
+            'p95_ms': round(percentiles[94] * 1000, 3),
+            'p99_ms': round(percentiles[98] * 1000, 3),
+        }
+        self.results[name] = result
+        return result
+
+    def check_regression(self, name):
+        """Сравнивает p95 замера с эталоном."""
+        baseline = self.baseline.get(name)
+        if baseline is None:
+            return
+        limit = baseline['p95_ms'] * (1 + self.tolerance)
+        p95 = self.results[name]['p95_ms']
+        assert p95 <= limit, (
+            f'{name}: p95 {p95} мс хуже эталона {baseline["p95_ms"]} мс '
+            f'больше чем на {self.tolerance:.0%}')
+
+    def save(self):
+        report = {'scale': self.scale, 'requests': self.requests,
+                  'results': dict(sorted(self.results.items()))}
+        paths = [self.config.getoption('--bench-output')]
+        if self.config.getoption('--bench-save-baseline'):
+            paths.append(self.config.getoption('--bench-baseline'))
+        for path in paths:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+                f.write('\n')
+
+
+@pytest.fixture(scope='session')
+def bench_run(request):
+    run = BenchmarkRun(request.config)
+    yield run
+    if run.results:
+        run.save()
+
+
+@pytest.fixture(scope='session')
+def dataset(django_db_setup, django_db_blocker, bench_run):
+    """Набор данных для замеров, общий для всей сессии."""
+    with django_db_blocker.unblock():
+        call_command('generate_data', seed=1, stdout=StringIO(),
+                     **{key: value * bench_run.scale
+                        for key, value in DATASET.items()})
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def benchmark(dataset, bench_run, db, settings):
+    """Замер с проверкой регрессии относительно эталона."""
+    settings.RESPONSE_CACHE = {'ENABLED': False}
+
+    def run(name, make_request, expected_status=200):
+        result = bench_run.measure(name, make_request, expected_status)
+        bench_run.check_regression(name)
+        return result
+
+    return run
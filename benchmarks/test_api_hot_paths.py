@@ -0,0 +1,110 @@
+"""Замеры пропускной способности и времени ответа основных маршрутов API."""
+
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from reviews.models import Review, Title, User
+
+WARMUP_OFFSET = 10
+
+
+@pytest.fixture
+def anon_client():
+    return APIClient()
+
+
+@pytest.fixture
+def author_clients(dataset):
+    """Клиенты новых пользователей, у которых ещё нет отзывов."""
+
+    def make(count):
+        clients = []
+        for i in range(count):
+            user = User.objects.create_user(
+                username=f'bench_author_{i}',
+                email=f'bench_author_{i}@yamdb.fake')
+            client = APIClient()
+            client.force_authenticate(user)
+            clients.append(client)
+        return clients
+
+    return make
+
+
+@pytest.fixture
+def popular_review(dataset):
+    return Review.objects.order_by('-comments_count', 'id').first()
+
+
+def test_titles_list(benchmark, anon_client):
+    url = reverse('api:title-list')
+    benchmark('titles_list', lambda i: anon_client.get(url))
+
+
+def test_titles_filter(benchmark, anon_client):
+    url = reverse('api:title-list')
+    filters = ({'genre': 'drama'}, {'category': 'book'}, {'year': 2000},
+               {'search': 'побег'}, {'name': 'Город'})
+    benchmark('titles_filter',
+              lambda i: anon_client.get(url, filters[i % len(filters)]))
+
+
+def test_titles_retrieve(benchmark, anon_client):
+    ids = list(Title.objects.values_list('id', flat=True)[:100])
+    benchmark('titles_retrieve', lambda i: anon_client.get(
+        reverse('api:title-detail', kwargs={'pk': ids[i % len(ids)]})))
+
+
+def test_reviews_list(benchmark, anon_client):
+    title = Title.objects.order_by('-rating_count', 'id').first()
+    url = reverse('api:reviews-list', kwargs={'title_id': title.id})
+    benchmark('reviews_list', lambda i: anon_client.get(url))
+
+
+def test_reviews_create(benchmark, bench_run, author_clients):
+    ids = list(Title.objects.values_list('id', flat=True))
+    requests = bench_run.requests + WARMUP_OFFSET
+    clients = author_clients(-(-requests // len(ids)))
+
+    def create(i):
+        i += WARMUP_OFFSET
+        url = reverse('api:reviews-list',
+                      kwargs={'title_id': ids[i % len(ids)]})
+        return clients[i // len(ids)].post(
+            url, {'text': 'Отзыв для замера', 'score': i % 10 + 1})
+
+    benchmark('reviews_create', create, expected_status=201)
+
+
+def test_comments_list(benchmark, anon_client, popular_review):
+    url = reverse('api:comments-list',
+                  kwargs={'title_id': popular_review.title_id,
+                          'review_id': popular_review.id})
+    benchmark('comments_list', lambda i: anon_client.get(url))
+
+
+def test_comments_create(benchmark, author_clients, popular_review):
+    client, = author_clients(1)
+    url = reverse('api:comments-list',
+                  kwargs={'title_id': popular_review.title_id,
+                          'review_id': popular_review.id})
+    benchmark('comments_create',
+              lambda i: client.post(url, {'text': 'Комментарий'}),
+              expected_status=201)
+
+
+def test_signup(benchmark, anon_client):
+    url = reverse('api:signup')
+    benchmark('signup', lambda i: anon_client.post(
+        url, {'username': f'bench_signup_{i + WARMUP_OFFSET}',
+              'email': f'bench_signup_{i + WARMUP_OFFSET}@yamdb.fake'}))
+
+
+def test_token(benchmark, anon_client):
+    user = User.objects.create_user(username='bench_token',
+                                    email='bench_token@yamdb.fake',
+                                    confirmation_code='bench-code')
+    url = reverse('api:token')
+    benchmark('token', lambda i: anon_client.post(
+        url, {'username': user.username,
+              'confirmation_code': user.confirmation_code}))